@@ -3,3 +3,14 @@
 """
 Init file for amagi_library
 """
+import logging
+
+try:
+    from amagi_library.helper.lazy_import import lazy_submodules
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import lazy_submodules
+
+__all__ = ["asset_helper", "blip_sdk", "boto3_helper", "helper", "hybrik_sdk"]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
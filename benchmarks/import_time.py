@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+# coding= utf-8
+"""
+This script benchmarks import time of common entry points with "python -X importtime"
+Every import runs in a fresh interpreter, run from the repository root : python benchmarks/import_time.py
+"""
+import argparse
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+# Entry points imported by services, each one is benchmarked on its own
+ENTRY_POINTS = ["boto3_helper", "boto3_helper.s3", "boto3_helper.s3_async", "boto3_helper.s3_sync",
+                "boto3_helper.dynamo", "boto3_helper.ses", "helper.amazon_signing", "helper.k8s_secret_config",
+                "blip_sdk.feeds", "hybrik_sdk.hybrik"]
+
+# Third party packages which should only be imported when their feature is used
+HEAVY_MODULES = ["boto3", "botocore", "smart_open", "requests", "yaml", "PIL"]
+
+# "import time: self | cumulative | name", name is indented by two spaces per nesting level
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+def measure(entry_point: str) -> dict:
+    """
+    This method imports entry_point in a fresh interpreter
+    :return: Cumulative microseconds of the entry point and heavy modules it imported, None if import failed
+    """
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {entry_point}"],
+                             cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if process.returncode:
+        logging.error(f"Import of {entry_point} failed : {process.stderr.strip().splitlines()[-1]}")
+        return None
+
+    cumulative = 0
+    modules = set()
+    for line in process.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if not match:
+            continue
+        modules.add(match.group(4))
+        # Top level entries of the entry point and its parent packages, nested imports are part of them
+        if not match.group(3) and (entry_point + ".").startswith(match.group(4) + "."):
+            cumulative += int(match.group(2))
+    return {"microseconds": cumulative,
+            "heavy_modules": sorted(module for module in HEAVY_MODULES if module in modules)}
+
+
+def benchmark(entry_points: list, repeat: int) -> list:
+    """
+    This method measures every entry point "repeat" times
+    :return: List of results with median milliseconds
+    """
+    results = list()
+    for entry_point in entry_points:
+        runs = [measure(entry_point) for _ in range(repeat)]
+        if None in runs:
+            results.append({"entry_point": entry_point, "milliseconds": None, "heavy_modules": None})
+            continue
+        results.append({"entry_point": entry_point,
+                        "milliseconds": round(statistics.median(run["microseconds"] for run in runs) / 1000, 1),
+                        "heavy_modules": runs[0]["heavy_modules"]})
+    return results
+
+
+if __name__ == "__main__":
+    # LOGGING #
+    logging_format = "%(asctime)s::%(funcName)s::%(levelname)s:: %(message)s"
+    logging.basicConfig(format=logging_format, level=logging.INFO, datefmt="%Y/%m/%d %H:%M:%S:%Z(%z)")
+
+    parser = argparse.ArgumentParser(description="Import time of amagi_library entry points")
+    parser.add_argument("entry_points", nargs="*", default=ENTRY_POINTS)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per entry point, median is shown")
+    arguments = parser.parse_args()
+
+    print(f"{'entry point':<28} {'median ms':>10}  heavy modules imported")
+    for result in benchmark(arguments.entry_points, arguments.repeat):
+        milliseconds = "failed" if result["milliseconds"] is None else result["milliseconds"]
+        print(f"{result['entry_point']:<28} {milliseconds:>10}  {', '.join(result['heavy_modules'] or []) or '-'}")
@@ -3,6 +3,15 @@
 """
 This is init file for blip_sdk module
 """
+import logging
+
+try:
+    from amagi_library.helper.lazy_import import lazy_submodules
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import lazy_submodules
 
 # This all can limit the python modules which needs to be exposed
 __all__ = ["feeds", "playlist", "media", "segments"]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
@@ -31,9 +31,9 @@ class Feeds(object):
         self.http_requests_instance = HTTPRequests()
         logging.debug(f"Instance variables for Feeds : {self.__dict__}")
 
-    def __del__(self):
+    def close(self):
         # Removing HTTP request session
-        self.http_requests_instance.__del__()
+        self.http_requests_instance.close()
 
     def get_feed_id_request(self):
         """
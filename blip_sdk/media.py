@@ -37,9 +37,9 @@ class Media(object):
 
         logging.debug(f"Instance variables for Media : {self.__dict__}")
 
-    def __del__(self):
+    def close(self):
         # Removing HTTP request session
-        self.http_requests_instance.__del__()
+        self.http_requests_instance.close()
 
     def get_all_media_details(self, **kwargs):
         """
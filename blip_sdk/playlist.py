@@ -35,9 +35,9 @@ class Playlist(object):
 
         logging.debug(f"Instance variables for Playlist : {self.__dict__}")
 
-    def __del__(self):
+    def close(self):
         # Removing HTTP request session
-        self.http_requests_instance.__del__()
+        self.http_requests_instance.close()
 
     def get_playlist_request(self, **kwargs):
         """
@@ -32,9 +32,9 @@ class Segments(object):
 
         logging.debug(f"Instance variables for Playlist : {self.__dict__}")
 
-    def __del__(self):
+    def close(self):
         # Removing HTTP request session
-        self.http_requests_instance.__del__()
+        self.http_requests_instance.close()
 
     def post_segment_information(self, media_id: str, **kwargs):
         """
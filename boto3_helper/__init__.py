@@ -3,4 +3,15 @@
 """
 Init file for boto3_helper
 """
-__all__ = ["batch", "dynamo", "s3", "ses", "s3_depreciated"]
+import logging
+
+try:
+    from amagi_library.helper.lazy_import import lazy_submodules
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import lazy_submodules
+
+__all__ = ["batch", "dynamo", "s3", "ses", "s3_async", "s3_batch_transfer", "s3_depreciated", "s3_snapshot", "s3_sync",
+           "session_cache"]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
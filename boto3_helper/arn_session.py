@@ -2,27 +2,98 @@
 # coding= utf-8
 """
 This scripts creates boto3 session based Assumed Role Credentials
+Assumed role credentials are cached on disk and shared by all processes of a node
 """
+import contextlib
 import datetime
+import hashlib
+import logging
+import os
 
 import boto3
 from botocore import credentials, session
+from botocore.utils import JSONFileCache
 from dateutil.tz import tzlocal
 
+try:
+    import fcntl
+except ModuleNotFoundError:
+    # Not available on Windows, cache is then used without locking
+    fcntl = None
 
-def assumed_role_session(role_arn, base_session):
+# Shared by all processes of the user on this node, files are written with 0600 permissions
+CREDENTIAL_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".aws", "boto3_helper", "cache")
+
+# Cached credentials are refreshed when they expire in less than this, botocore refreshes
+# DeferredRefreshableCredentials 15 minutes (advisory) and 10 minutes (mandatory) before expiry
+EXPIRY_WINDOW_SECONDS = 15 * 60
+
+
+class LockedJSONFileCache(JSONFileCache):
+    """
+    This class is botocore JSONFileCache with an exclusive file lock per cache key
+    """
+
+    @contextlib.contextmanager
+    def lock(self, cache_key: str):
+        """
+        Context manager which holds an exclusive lock on cache_key across processes
+        """
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(self._working_dir, mode=0o700, exist_ok=True)
+        with open(os.path.join(self._working_dir, f"{cache_key}.lock"), "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+class CachedAssumeRoleCredentialFetcher(credentials.AssumeRoleCredentialFetcher):
+    """
+    This class fetches assumed role credentials through a LockedJSONFileCache keyed by role ARN and source identity
+    Cache is read and, when the credentials are missing or about to expire, refreshed under the file lock, so
+    processes starting together make one AssumeRole call between them
+    """
+
+    def _create_cache_key(self):
+        # Access key id identifies the source identity without a GetCallerIdentity call
+        source_identity = self._source_credentials.get_frozen_credentials().access_key
+        return hashlib.sha256(f"{self._role_arn}|{source_identity}|{self._role_session_name}".encode()).hexdigest()
+
+    def fetch_credentials(self):
+        with self._cache.lock(self._cache_key):
+            return super().fetch_credentials()
+
+
+def assumed_role_session(role_arn, base_session, cache_directory=CREDENTIAL_CACHE_DIRECTORY):
     """
     This method is ripped of from below url to get AWS session using AssumeRoleProvider
     xref: https://stackoverflow.com/questions/44171849/aws-boto3-assumerole-example-which-includes-role-usage\
     :param role_arn: URI for role, example : "arn:aws:iam::123456789:role/role-crossaccount-xyz"
     :param base_session: Base Session for which ARP has been provided
+    :param cache_directory: Directory of the credential cache shared between processes, None to keep credentials
+                            in memory of this process only
     :return: Boto3 session with ARP
     """
-    fetcher = credentials.AssumeRoleCredentialFetcher(
-        client_creator=base_session.create_client,
-        source_credentials=base_session.get_credentials(),
-        role_arn=role_arn
-    )
+    if cache_directory:
+        fetcher = CachedAssumeRoleCredentialFetcher(
+            client_creator=base_session.create_client,
+            source_credentials=base_session.get_credentials(),
+            role_arn=role_arn,
+            # Fixed session name, so that every process maps to the same cache entry
+            extra_args={"RoleSessionName": "boto3_helper"},
+            cache=LockedJSONFileCache(cache_directory),
+            expiry_window_seconds=EXPIRY_WINDOW_SECONDS
+        )
+    else:
+        fetcher = credentials.AssumeRoleCredentialFetcher(
+            client_creator=base_session.create_client,
+            source_credentials=base_session.get_credentials(),
+            role_arn=role_arn
+        )
     creds = credentials.DeferredRefreshableCredentials(
         method="assume-role",
         refresh_using=fetcher.fetch_credentials,
@@ -30,4 +101,5 @@ def assumed_role_session(role_arn, base_session):
     )
     botocore_session = session.Session()
     botocore_session._credentials = creds
+    logging.debug(f"Assumed role session for {role_arn} (credential cache : {cache_directory})")
     return boto3.Session(botocore_session=botocore_session)
@@ -7,16 +7,18 @@ import logging
 import traceback
 
 try:
-    from amagi_library.boto3_helper.client import Client
+    from amagi_library.boto3_helper.client import LazyClient
 except ModuleNotFoundError:
     logging.info("Module called internally")
-    from boto3_helper.client import Client
+    from boto3_helper.client import LazyClient
 
 
 class SubmitBatchJob(object):
     """
     This Class handles firing batch job
     """
+    # Batch Client instance to use, created on first use from aws_details
+    batch_instance = LazyClient("batch")
 
     def __init__(self, **kwargs):
 
@@ -24,7 +26,6 @@ class SubmitBatchJob(object):
         self.aws_details = None
         self.__dict__.update(kwargs)
 
-        self.batch_instance = Client(aws_details=self.aws_details).return_client(service_name="batch")
         logging.debug(f"Instance variables for submitBatchJob : {self.__dict__}")
 
     def submit_job(self, **kwargs):
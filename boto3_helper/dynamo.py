@@ -7,26 +7,29 @@ Xref : https://martinapugliese.github.io/interacting-with-a-dynamodb-via-boto3/
 import logging
 import traceback
 
-from boto3.dynamodb.conditions import Key
-
 try:
-    from amagi_library.boto3_helper.resource import Resource
+    from amagi_library.boto3_helper.resource import LazyResource
+    from amagi_library.helper.lazy_import import LazyModule
 except ModuleNotFoundError:
     logging.info("Module called internally")
-    from boto3_helper.resource import Resource
+    from boto3_helper.resource import LazyResource
+    from helper.lazy_import import LazyModule
+
+# Imported on first query, boto3 is not needed to construct DynamoAccessor
+conditions = LazyModule("boto3.dynamodb.conditions")
 
 
 class DynamoAccessor(object):
     """
         This Class handles access of dynamo DB resource
     """
+    # DynamoDB Resource instance to use, created on first use from aws_details
+    dynamo_db_resource = LazyResource("dynamodb")
 
     def __init__(self, **kwargs):
         self.aws_details = None
         self.__dict__.update(kwargs)
 
-        self.dynamo_db_resource = Resource(aws_details=self.aws_details).return_resource(service_name="dynamodb")
-
         logging.debug(f"Instance variables for DynamoResource : {self.__dict__}")
 
     def is_table_present(self, table_name):
@@ -199,7 +202,7 @@ class DynamoAccessor(object):
         table = self.dynamo_db_resource.Table(table_name)
 
         if filter_key and filter_value:
-            filtering_exp = Key(filter_key).eq(filter_value)
+            filtering_exp = conditions.Key(filter_key).eq(filter_value)
             response = table.scan(FilterExpression=filtering_exp)
         else:
             response = table.scan()
@@ -215,7 +218,7 @@ class DynamoAccessor(object):
         table = self.dynamo_db_resource.Table(table_name)
 
         if filter_key and filter_value:
-            filtering_exp = Key(filter_key).eq(filter_value)
+            filtering_exp = conditions.Key(filter_key).eq(filter_value)
             response = table.query(KeyConditionExpression=filtering_exp)
         else:
             response = table.query()
@@ -232,7 +235,7 @@ class DynamoAccessor(object):
         table = self.dynamo_db_resource.Table(table_name)
 
         if filter_key and filter_value:
-            filtering_exp = Key(filter_key).eq(filter_value)
+            filtering_exp = conditions.Key(filter_key).eq(filter_value)
             response = table.scan(FilterExpression=filtering_exp)
         else:
             response = table.scan()
@@ -6,13 +6,13 @@ This scripts provides wrapper over AWS resource
 import logging
 import traceback
 
-import boto3
-
 try:
-    from amagi_library.boto3_helper.arn_session import assumed_role_session
+    from amagi_library.boto3_helper.session import LazyAWSAttribute, Session, transport_arguments
+    from amagi_library.boto3_helper.session_cache import SessionCache
 except ModuleNotFoundError:
     logging.info("Module called internally")
-    from boto3_helper.arn_session import assumed_role_session
+    from boto3_helper.session import LazyAWSAttribute, Session, transport_arguments
+    from boto3_helper.session_cache import SessionCache
 
 
 class Resource(object):
@@ -22,6 +22,13 @@ class Resource(object):
 
     def __init__(self, **kwargs):
         self.aws_details = None
+
+        # Resources are cached per thread through SessionCache, False creates a private resource
+        self.use_cache = True
+
+        # Companion transport settings, override "transport_config" of aws_details, see transport_arguments
+        self.transport_config = None
+
         self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for Resource : {self.__dict__}")
@@ -34,38 +41,33 @@ class Resource(object):
         resource = None
 
         try:
-            if self.aws_details:
-                # Checking if assigned_role_arn is provided or not
-                if {"assigned_role_arn", "access_key", "secret_key", "region_name"}.issubset(
-                        set(self.aws_details.keys())):
-
-                    # Created base session
-                    base_session = boto3.session.Session(
-                        aws_access_key_id=self.aws_details["access_key"],
-                        aws_secret_access_key=self.aws_details["secret_key"],
-                        region_name=self.aws_details["region_name"])
-
-                    # Created ARN session ( This is a boto3 session )
-                    arn_session = assumed_role_session(role_arn=self.aws_details["assigned_role_arn"],
-                                                       base_session=base_session._session)
-
-                    # Created resource from ARN session
-                    resource = arn_session.resource(service_name)
-
-                elif {"access_key", "secret_key", "region_name"}.issubset(set(self.aws_details.keys())):
-                    # Created normal resource in case of no ARN
-                    resource = boto3.Session(aws_access_key_id=self.aws_details["access_key"],
-                                             aws_secret_access_key=self.aws_details["secret_key"],
-                                             region_name=self.aws_details["region_name"]).resource(service_name)
-
-                elif {"profile_name"}.issubset(set(self.aws_details.keys())):
-                    # Created normal clients in case of no ARN using profile name
-                    resource = boto3.Session(profile_name=self.aws_details["profile_name"]).resource(service_name)
-            else:
-                # Create normal resource if no credentials are provided
-                resource = boto3.Session().resource(service_name)
+            # botocore Config and endpoint_url from transport settings
+            arguments = transport_arguments(self.aws_details, self.transport_config)
+
+            if self.use_cache:
+                # Built from the cached session of aws_details, so AssumeRole happens once per process
+                return SessionCache.resource(self.aws_details, service_name,
+                                             Session(aws_details=self.aws_details).create_session, **arguments)
+
+            # Private session, credentials are resolved the same way as for a cached one
+            session = Session(aws_details=self.aws_details, transport_config=self.transport_config).create_session()
+            if session is not None:
+                resource = session.resource(service_name, **arguments)
 
         except BaseException:
             logging.error(f"Uncaught exception in resource.py: {traceback.format_exc()}")
             raise BaseException("Problem in resource.py")
         return resource
+
+
+class LazyResource(LazyAWSAttribute):
+    """
+    Descriptor which creates the AWS resource of a service on first access, ex: table = LazyResource("dynamodb")
+    """
+
+    def __init__(self, service_name: str, aws_details_attribute="aws_details"):
+        super().__init__(aws_details_attribute)
+        self.service_name = service_name
+
+    def create(self, aws_details):
+        return Resource(aws_details=aws_details).return_resource(service_name=self.service_name)
@@ -3,79 +3,1028 @@
 """
 This scripts provides wrapper over AWS S3
 """
+import hashlib
+import io
+import itertools
+import json
 import logging
+import math
+import mmap
+import os
+import queue
+import threading
 import traceback
+import zlib
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlencode
 
-from smart_open import open
+from botocore.exceptions import ClientError
 
 try:
-    from amagi_library.boto3_helper.session import Session
-    from amagi_library.boto3_helper.client import Client
-    from amagi_library.helper.http_requests import HTTPRequests
+    from amagi_library.boto3_helper.session import LazySession
+    from amagi_library.boto3_helper.client import LazyClient
+    from amagi_library.helper.hash_calculator import TransferDigest
+    from amagi_library.helper.lazy_import import LazyModule
 
 except ModuleNotFoundError:
     logging.info("Module called internally")
-    from boto3_helper.session import Session
-    from boto3_helper.client import Client
-    from helper.http_requests import HTTPRequests
+    from boto3_helper.session import LazySession
+    from boto3_helper.client import LazyClient
+    from helper.hash_calculator import TransferDigest
+    from helper.lazy_import import LazyModule
+
+# Imported on first URL read or compressed object read, smart_open imports every transport it supports
+smart_open = LazyModule("smart_open")
+smart_open_compression = LazyModule("smart_open.compression")
+
+
+class S3ObjectCache(object):
+    """
+    This class is a LRU cache of S3 objects stored with their ETag, entries are revalidated with If-None-Match
+    Objects are kept in memory, or as files under work_directory (helper.workdir.WorkDirectory) if provided
+    """
+
+    def __init__(self, **kwargs):
+        # DEFAULT SIZE CAP in bytes for all cached objects together
+        self.max_size = 256 * 1024 ** 2
+        self.work_directory = None
+
+        self.__dict__.update(kwargs)
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.current_size = 0
+
+        # (bucket_name, object_path) -> {"ETag", "Size", "data" or "file_path"} in least recently used order
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        logging.debug(f"Instance variables for S3ObjectCache : {self.__dict__}")
+
+    def etag_of(self, bucket_name: str, object_path: str):
+        """
+        This method returns ETag of the cached object
+        :return: ETag if object is cached, None otherwise
+        """
+        with self.lock:
+            entry = self.entries.get((bucket_name, object_path))
+            return entry["ETag"] if entry else None
+
+    def revalidated(self, bucket_name: str, object_path: str):
+        """
+        This method returns cached data after S3 confirmed (304) that it is unchanged and counts a hit
+        :return: Data in bytes, None if the object got evicted meanwhile
+        """
+        with self.lock:
+            entry = self.entries.get((bucket_name, object_path))
+            if not entry:
+                return None
+            self.entries.move_to_end((bucket_name, object_path))
+            self.hits += 1
+            if entry.get("file_path") is None:
+                return entry["data"]
+            # Read under the lock, else another thread could evict or rewrite the file meanwhile
+            with io.open(entry["file_path"], "rb") as cached_file:
+                return cached_file.read()
+
+    def __evict(self, key: tuple):
+        """
+        This method removes one entry, lock must be held by the caller
+        :param key: (bucket_name, object_path)
+        """
+        entry = self.entries.pop(key)
+        self.current_size -= entry["Size"]
+        if entry.get("file_path"):
+            os.remove(entry["file_path"])
+
+    def store(self, bucket_name: str, object_path: str, etag: str, data: bytes):
+        """
+        This method stores freshly downloaded data and counts a miss, least recently used entries are evicted
+        Objects bigger than max_size are not cached
+        """
+        key = (bucket_name, object_path)
+        entry = {"ETag": etag, "Size": len(data)}
+        if self.work_directory and len(data) <= self.max_size:
+            file_name = hashlib.sha256(f"{bucket_name}/{object_path}".encode()).hexdigest()
+            entry["file_path"] = os.path.join(self.work_directory.get_work_dir(), file_name)
+        else:
+            entry["data"] = data
+
+        with self.lock:
+            self.misses += 1
+            if key in self.entries:
+                self.__evict(key)
+            if len(data) > self.max_size:
+                return
+            while self.current_size + len(data) > self.max_size:
+                self.__evict(next(iter(self.entries)))
+                self.evictions += 1
+            if entry.get("file_path"):
+                with io.open(entry["file_path"], "wb") as cached_file:
+                    cached_file.write(data)
+            self.entries[key] = entry
+            self.current_size += len(data)
+
+    def statistics(self) -> dict:
+        """
+        This method returns the cache counters
+        """
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "objects": len(self.entries), "size": self.current_size}
+
+    def clear(self):
+        """
+        This method removes every cached object, counters are kept
+        """
+        with self.lock:
+            for key in list(self.entries):
+                self.__evict(key)
+
+
+class S3ObjectReader(io.RawIOBase):
+    """
+    This class is a seekable raw reader over an S3 object, bytes are fetched with ranged GET requests
+    Wrap it in io.BufferedReader to get a file like object with a bounded buffer
+    """
+
+    def __init__(self, s3_instance, bucket_name: str, object_path: str, range_size=16 * 1024 ** 2):
+        super().__init__()
+        self.s3_instance = s3_instance
+        self.bucket_name = bucket_name
+        self.object_path = object_path
+        # Bytes asked for in one GET request, a GET is never left streaming more than this
+        self.range_size = range_size
+
+        self.head_response = self.s3_instance.head_object(Bucket=bucket_name, Key=object_path)
+        self.size = self.head_response["ContentLength"]
+        self.etag = self.head_response["ETag"]
+        self.content_encoding = self.head_response.get("ContentEncoding")
+
+        self.position = 0
+        self.body = None
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def __close_body(self):
+        if self.body is not None:
+            self.body.close()
+            self.body = None
+
+    def seek(self, offset: int, whence=io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence : {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position : {position}")
+        if position != self.position:
+            self.__close_body()
+            self.position = position
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        while self.position < self.size:
+            if self.body is None:
+                last_byte = min(self.position + self.range_size, self.size) - 1
+                # Pinned to the ETag seen at open, so a changed object fails instead of mixing versions
+                self.body = self.s3_instance.get_object(Bucket=self.bucket_name, Key=self.object_path,
+                                                        Range=f"bytes={self.position}-{last_byte}",
+                                                        IfMatch=self.etag)["Body"]
+            data = self.body.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                self.position += len(data)
+                return len(data)
+            # Current range is exhausted, next read opens the next range
+            self.__close_body()
+        return 0
+
+    def close(self):
+        self.__close_body()
+        super().close()
+
+
+class MemoryViewReader(io.RawIOBase):
+    """
+    This class is a seekable raw reader over a bytes like object, used as request body so that memoryview
+    parts are sent without copying them first (botocore accepts bytes, bytearray or file like bodies only)
+    """
+
+    def __init__(self, data):
+        super().__init__()
+        self.data = memoryview(data)
+        self.position = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence=io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = len(self.data) + offset
+        else:
+            raise ValueError(f"Invalid whence : {whence}")
+        if position < 0:
+            raise ValueError(f"Negative seek position : {position}")
+        self.position = position
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        size = max(min(len(buffer), len(self.data) - self.position), 0)
+        buffer[:size] = self.data[self.position:self.position + size]
+        self.position += size
+        return size
+
+
+class ContentEncoding(object):
+    """
+    This class provides streaming compression and decompression for S3 Content-Encoding gzip and zstd
+    zstd needs the optional zstandard package
+    """
+    supported = ("gzip", "zstd")
+    default_levels = {"gzip": 6, "zstd": 3}
+
+    @staticmethod
+    def __zstandard():
+        try:
+            import zstandard
+        except ModuleNotFoundError:
+            raise ModuleNotFoundError("zstd Content-Encoding needs the zstandard package (pip install zstandard)")
+        return zstandard
+
+    @staticmethod
+    def compressor(content_encoding: str, level=None):
+        """
+        This method returns a compressor object with compress(data) and flush()
+        :param content_encoding: "gzip" or "zstd"
+        :param level: Compression level, default from default_levels
+        """
+        if content_encoding not in ContentEncoding.supported:
+            raise ValueError(f"Unsupported Content-Encoding : {content_encoding}")
+        level = level if level is not None else ContentEncoding.default_levels[content_encoding]
+        if content_encoding == "gzip":
+            # wbits 31 writes a gzip header and trailer
+            return zlib.compressobj(level, zlib.DEFLATED, 31)
+        return ContentEncoding.__zstandard().ZstdCompressor(level=level).compressobj()
+
+    @staticmethod
+    def decompress_chunks(chunks, content_encoding: str):
+        """
+        Lazy function (generator) to decompress an iterable of compressed chunks, concatenated gzip members or
+        zstd frames are decompressed one after another
+        :param chunks: Iterable of compressed bytes
+        :param content_encoding: "gzip" or "zstd"
+        """
+        if content_encoding == "gzip":
+            def new_decompressor():
+                return zlib.decompressobj(wbits=31)
+        elif content_encoding == "zstd":
+            new_decompressor = ContentEncoding.__zstandard().ZstdDecompressor().decompressobj
+        else:
+            raise ValueError(f"Unsupported Content-Encoding : {content_encoding}")
+
+        decompressor = new_decompressor()
+        in_member = False
+        for chunk in chunks:
+            while chunk:
+                in_member = True
+                data = decompressor.decompress(chunk)
+                if data:
+                    yield data
+                if not decompressor.eof:
+                    break
+                in_member = False
+                chunk = decompressor.unused_data
+                decompressor = new_decompressor()
+        if in_member:
+            raise EOFError(f"Truncated {content_encoding} content")
+
+
+class CompressingReader(io.RawIOBase):
+    """
+    This class is a raw reader which compresses another file like object as it is read
+    """
+
+    def __init__(self, file_object, content_encoding: str, level=None, chunk_size=1024 ** 2):
+        super().__init__()
+        self.file_object = file_object
+        self.chunk_size = chunk_size
+        self.compressor = ContentEncoding.compressor(content_encoding, level)
+        self.pending = bytearray()
+        self.finished = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        # Buffer is filled completely unless the source is exhausted, so parts read from here are full
+        while len(self.pending) < len(buffer) and not self.finished:
+            data = self.file_object.read(self.chunk_size)
+            if data:
+                self.pending += self.compressor.compress(data)
+            else:
+                self.pending += self.compressor.flush()
+                self.finished = True
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        del self.pending[:size]
+        return size
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    This class is a raw reader which decompresses another file like object as it is read
+    """
+
+    def __init__(self, file_object, content_encoding: str, chunk_size=1024 ** 2):
+        super().__init__()
+        self.file_object = file_object
+        self.chunks = ContentEncoding.decompress_chunks(iter(lambda: file_object.read(chunk_size), b""),
+                                                        content_encoding)
+        self.pending = memoryview(b"")
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return 0
+            self.pending = memoryview(chunk)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        self.file_object.close()
+        super().close()
+
+
+class PartBufferPool(object):
+    """
+    This class reads a stream into a fixed set of preallocated part buffers on a reader thread
+    Memory is capped at buffer_count * part_size, a buffer is filled again only after its part is released
+    """
+
+    def __init__(self, part_size: int, buffer_count: int):
+        self.part_size = part_size
+        self.buffer_count = buffer_count
+        self.free_buffers = queue.Queue()
+        for _ in range(buffer_count):
+            self.free_buffers.put(bytearray(part_size))
+        self.filled_parts = queue.Queue()
+        self.stopped = threading.Event()
+
+    def release(self, part):
+        """
+        This method gives buffer of an uploaded part back to the reader
+        :param part: memoryview yielded by read_parts
+        """
+        self.free_buffers.put(part.obj)
+
+    def __fill(self, file_object):
+        """
+        This method runs on the reader thread, every part except the last one is filled completely
+        """
+        try:
+            while not self.stopped.is_set():
+                buffer = self.free_buffers.get()
+                if buffer is None:
+                    break
+                buffer_view = memoryview(buffer)
+                filled = 0
+                while filled < self.part_size:
+                    read = file_object.readinto(buffer_view[filled:])
+                    if not read:
+                        break
+                    filled += read
+                if filled:
+                    self.filled_parts.put(buffer_view[:filled])
+                if filled < self.part_size:
+                    break
+            self.filled_parts.put(None)
+        except BaseException as error:
+            self.filled_parts.put(error)
+
+    def read_parts(self, file_object):
+        """
+        Lazy function (generator) to read a file in parts on a reader thread, parts are memoryviews of pooled
+        buffers and each one has to be given back with release once it is uploaded
+        :param file_object: File like object opened in binary mode, with readinto
+        """
+        reader = threading.Thread(target=self.__fill, args=(file_object,), name="part_reader", daemon=True)
+        reader.start()
+        try:
+            while True:
+                part = self.filled_parts.get()
+                if part is None:
+                    return
+                if isinstance(part, BaseException):
+                    raise part
+                yield part
+        finally:
+            self.stopped.set()
+            # Wakes the reader if it waits for a free buffer
+            self.free_buffers.put(None)
+            reader.join()
 
 
 class DisplayS3Object(object):
     """
     This class handles list of object data from S3
     """
+    # Session and S3 Client instance to use, created on first use from aws_details
+    session_instance = LazySession()
+    s3_instance = LazyClient("s3")
 
     def __init__(self, **kwargs):
         # Required variable to drive this Class, expected to be provided from parent Object
         self.aws_details = None
-        self.__dict__.update(kwargs)
 
-        self.session_instance = Session(aws_details=self.aws_details).return_session()
+        # Optional S3ObjectCache, can be shared between instances
+        self.object_cache = None
+
+        # DEFAULT CHUNK SIZE for iterate_object_content, BUFFER AND RANGE SIZE for open_object
+        self.chunk_size = 1024 ** 2
+        self.buffer_size = 1024 ** 2
+        self.range_size = 16 * 1024 ** 2
+
+        # Objects stored with Content-Encoding gzip or zstd are decompressed while read (not for byte ranges)
+        self.decode_content = True
+
+        self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for DisplayS3Object : {self.__dict__}")
 
+    def is_decoded(self, response: dict) -> bool:
+        """
+        This method tells whether the body of a get_object or head_object response is to be decompressed
+        """
+        return bool(self.decode_content) and response.get("ContentEncoding") in ContentEncoding.supported
+
+    def __read_content(self, response: dict, object_path: str) -> bytes:
+        """
+        This method reads the body of a get_object response, decompressed by Content-Encoding or file extension
+        """
+        if self.is_decoded(response):
+            with DecompressingReader(response["Body"], response["ContentEncoding"]) as f_read:
+                return f_read.read()
+
+        # Like smart_open, objects with a compressed file extension (ex: .gz) are decompressed
+        # The return data is in binary
+        with smart_open_compression.compression_wrapper(response["Body"], "rb", filename=object_path) as f_read:
+            return f_read.read()
+
+    def __cached_object_content(self, bucket_name: str, object_path: str) -> bytes:
+        """
+        This method reads object through the cache, a cached object costs only a conditional GET (304)
+        :param bucket_name: Bucket name
+        :param object_path: Object path
+        :return: Data in bytes
+        """
+        etag = self.object_cache.etag_of(bucket_name, object_path)
+        if etag:
+            try:
+                response = self.s3_instance.get_object(Bucket=bucket_name, Key=object_path, IfNoneMatch=etag)
+            except ClientError as error:
+                if error.response["ResponseMetadata"]["HTTPStatusCode"] != 304:
+                    raise
+                data = self.object_cache.revalidated(bucket_name, object_path)
+                if data is not None:
+                    return data
+                response = self.s3_instance.get_object(Bucket=bucket_name, Key=object_path)
+        else:
+            response = self.s3_instance.get_object(Bucket=bucket_name, Key=object_path)
+
+        # Cache keeps decompressed data, a revalidated object is not decompressed again
+        data = self.__read_content(response, object_path)
+        self.object_cache.store(bucket_name, object_path, response["ETag"], data)
+        return data
+
     def object_content(self, **kwargs) -> bytes:
         """
-        This method downloads file from local machine to s3 and then prints it
+        This method downloads file from s3 and returns its content
         """
         try:
-            object_address = f"s3://{kwargs['s3_details']['bucket_name']}/" \
-                             f"{kwargs['object_path']}"
+            if self.object_cache:
+                return self.__cached_object_content(kwargs["s3_details"]["bucket_name"], kwargs["object_path"])
+
+            response = self.s3_instance.get_object(Bucket=kwargs["s3_details"]["bucket_name"],
+                                                   Key=kwargs["object_path"])
+            return self.__read_content(response, kwargs["object_path"])
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
+
+    def object_range(self, **kwargs) -> bytes:
+        """
+        This method downloads only a byte range of the object, ex: first few KB to read a header
+        :return: Data in bytes from "first_byte" to "last_byte" (inclusive, till end of object if not given)
+        """
+        try:
+            first_byte = kwargs.get("first_byte", 0)
+            last_byte = kwargs.get("last_byte")
+            byte_range = f"bytes={first_byte}-{last_byte}" if last_byte is not None else f"bytes={first_byte}-"
+
+            return self.s3_instance.get_object(Bucket=kwargs["s3_details"]["bucket_name"],
+                                               Key=kwargs["object_path"],
+                                               Range=byte_range)["Body"].read()
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
+
+    def iterate_object_content(self, **kwargs):
+        """
+        Generator which yields the object (or a byte range of it) in chunks of "chunk_size"
+        Whole objects with a supported Content-Encoding are yielded decompressed, chunk sizes then vary
+        Exceptions are raised to the caller so that partial content is never mistaken for the full object
+        """
+        arguments = {"Bucket": kwargs["s3_details"]["bucket_name"], "Key": kwargs["object_path"]}
+        if "first_byte" in kwargs or "last_byte" in kwargs:
+            arguments["Range"] = f"bytes={kwargs.get('first_byte', 0)}-{kwargs.get('last_byte', '')}"
 
-            # The return data is in binary
-            return open(object_address, "rb",
-                        transport_params={"session": self.session_instance}).read()
+        response = self.s3_instance.get_object(**arguments)
+        body = response["Body"]
+        try:
+            chunks = body.iter_chunks(chunk_size=kwargs.get("chunk_size") or self.chunk_size)
+            if "Range" not in arguments and self.is_decoded(response):
+                chunks = ContentEncoding.decompress_chunks(chunks, response["ContentEncoding"])
+            yield from chunks
+        finally:
+            body.close()
+
+    def open_object(self, **kwargs):
+        """
+        This method opens the object as a seekable, read only file like object
+        Data is fetched with ranged GET requests as it is read, memory is bounded by "buffer_size"
+        Objects with a supported Content-Encoding are decompressed as read, those are not seekable
+        :return: io.BufferedReader over S3ObjectReader, to be closed by the caller
+        """
+        try:
+            reader = S3ObjectReader(self.s3_instance, kwargs["s3_details"]["bucket_name"], kwargs["object_path"],
+                                    kwargs.get("range_size") or self.range_size)
+            if self.is_decoded({"ContentEncoding": reader.content_encoding}):
+                reader = DecompressingReader(reader, reader.content_encoding)
+            return io.BufferedReader(reader, buffer_size=kwargs.get("buffer_size") or self.buffer_size)
 
         except BaseException:
             logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
 
 
+class S3MultipartUpload(object):
+    """
+    This class uploads an object to S3 in parts, parts are uploaded in parallel on a bounded thread pool
+    """
+    # AWS limits for multipart upload
+    minimum_part_size = 5 * 1024 ** 2
+    maximum_part_count = 10000
+
+    def __init__(self, **kwargs):
+        # Required variable to drive this Class, expected to be provided from parent Object
+        self.s3_instance = None
+
+        # DEFAULT PART SIZE AND PARALLEL PART UPLOADS
+        self.part_size = 64 * 1024 ** 2
+        self.max_workers = 8
+
+        # Digests calculated while uploading, ex: ("md5", "sha256"), parts are then sent with Content-MD5
+        # and the final ETag is verified. None to skip.
+        self.checksum_algorithms = None
+
+        # threading.Event, once set no more parts are started and the upload fails (and is aborted by upload)
+        self.cancel_event = None
+
+        self.__dict__.update(kwargs)
+
+        logging.debug(f"Instance variables for S3MultipartUpload : {self.__dict__}")
+
+    def part_size_for(self, object_size: int) -> int:
+        """
+        This method returns part size which keeps the object within AWS part count limit
+        :param object_size: Size of the object in bytes
+        :return: Part size in bytes
+        """
+        return max(self.part_size, S3MultipartUpload.minimum_part_size,
+                   math.ceil(object_size / S3MultipartUpload.maximum_part_count))
+
+    @staticmethod
+    def split_in_parts(data, part_size: int):
+        """
+        Lazy function (generator) to split bytes like data in parts without copying it
+        :param data: Data in bytes format
+        :param part_size: Size of each part
+        """
+        data_view = memoryview(data)
+        for offset in range(0, len(data_view), part_size):
+            yield data_view[offset:offset + part_size]
+
+    @staticmethod
+    def request_body(data):
+        """
+        This method returns data in a form botocore accepts as Body, memoryviews are wrapped without copying
+        """
+        return data if isinstance(data, (bytes, bytearray)) else MemoryViewReader(data)
+
+    @staticmethod
+    def read_in_parts(file_object, part_size: int):
+        """
+        Lazy function (generator) to read a file in parts of exactly part_size, except the last one
+        :param file_object: File like object opened in binary mode
+        :param part_size: Size of each part
+        """
+        while True:
+            data = file_object.read(part_size)
+            # Streams can return less than asked for, parts except the last one need to be full
+            while data and len(data) < part_size:
+                remaining_data = file_object.read(part_size - len(data))
+                if not remaining_data:
+                    break
+                data += remaining_data
+            if not data:
+                break
+            yield data
+
+    def __upload_part(self, upload_details: dict, part_number: int, data, content_md5=None) -> dict:
+        """
+        This method uploads one part of the multipart upload
+        :param upload_details: Bucket, Key and UploadId of the multipart upload
+        :param part_number: Part number of this part (starts from 1)
+        :param data: Data of this part
+        :param content_md5: Base64 md5 of data, S3 rejects the part if it does not match
+        :return: Part details required to complete the multipart upload
+        """
+        body = S3MultipartUpload.request_body(data)
+        if content_md5:
+            response = self.s3_instance.upload_part(PartNumber=part_number, Body=body, ContentMD5=content_md5,
+                                                    **upload_details)
+        else:
+            response = self.s3_instance.upload_part(PartNumber=part_number, Body=body, **upload_details)
+        return {"ETag": response["ETag"], "PartNumber": part_number}
+
+    def raise_if_cancelled(self):
+        """
+        This method raises InterruptedError if cancel_event is set
+        """
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise InterruptedError("Multipart upload cancelled")
+
+    def new_transfer_digest(self):
+        """
+        This method returns a TransferDigest for the configured checksum_algorithms
+        :return: TransferDigest, None if checksums are not asked for
+        """
+        return TransferDigest(self.checksum_algorithms) if self.checksum_algorithms else None
+
+    @staticmethod
+    def has_md5_etag(response: dict) -> bool:
+        """
+        This method tells whether the ETag of an object is derived from md5 of its data
+        ETag of SSE-KMS and SSE-C objects is not, plain and SSE-S3 objects have one
+        :param response: Response from head_object, put_object or complete_multipart_upload
+        """
+        return not (response.get("ServerSideEncryption", "").startswith("aws:kms") or
+                    response.get("SSECustomerAlgorithm"))
+
+    @staticmethod
+    def verify_etag(response: dict, transfer_digest) -> dict:
+        """
+        This method verifies the ETag returned by S3 against the one calculated while uploading
+        ETag of SSE-KMS and SSE-C objects is not an md5, those are not compared
+        :param response: Response from put_object or complete_multipart_upload
+        :param transfer_digest: TransferDigest fed with every part, None to skip
+        :return: Response with "Digests" added when transfer_digest is provided
+        """
+        if transfer_digest is None:
+            return response
+        digests = transfer_digest.hexdigests()
+        if not S3MultipartUpload.has_md5_etag(response):
+            logging.debug("ETag is not an md5 for this encryption, skipped ETag verification")
+        elif response["ETag"] != digests["etag"]:
+            raise IOError(f"ETag mismatch : S3 returned {response['ETag']}, calculated {digests['etag']}")
+        response["Digests"] = digests
+        return response
+
+    def upload(self, parts, bucket_name: str, object_path: str, part_release_callback=None,
+               **extra_arguments) -> dict:
+        """
+        This method uploads parts in parallel and completes them in order
+        Object with a single part is uploaded with put_object, multipart upload is aborted on failure
+        :param parts: Iterable of bytes like parts in order, all except the last one must be of same size
+        :param bucket_name: Destination bucket name
+        :param object_path: Destination object path
+        :param part_release_callback: Callable called with each part once it is uploaded, see upload_parts
+        :param extra_arguments: Extra arguments for create_multipart_upload or put_object, ex: ContentType
+        :return: Response from complete_multipart_upload or put_object, with "Digests" if checksums are asked for
+        """
+        transfer_digest = self.new_transfer_digest()
+
+        parts = iter(parts)
+        first_part = next(parts, b"")
+        second_part = next(parts, None)
+        if second_part is None:
+            if transfer_digest:
+                extra_arguments["ContentMD5"] = transfer_digest.update_part(first_part)
+            return S3MultipartUpload.verify_etag(
+                self.s3_instance.put_object(Bucket=bucket_name, Key=object_path,
+                                            Body=S3MultipartUpload.request_body(first_part), **extra_arguments),
+                transfer_digest)
+
+        upload_id = self.s3_instance.create_multipart_upload(Bucket=bucket_name, Key=object_path,
+                                                             **extra_arguments)["UploadId"]
+        upload_details = {"Bucket": bucket_name, "Key": object_path, "UploadId": upload_id}
+        try:
+            return self.upload_parts(itertools.chain([first_part, second_part], parts), upload_details,
+                                     transfer_digest=transfer_digest, part_release_callback=part_release_callback)
+        except BaseException:
+            logging.error(f"Aborting multipart upload of s3://{bucket_name}/{object_path}")
+            self.s3_instance.abort_multipart_upload(**upload_details)
+            raise
+
+    def upload_parts(self, parts, upload_details: dict, first_part_number=1, completed_parts=None,
+                     part_done_callback=None, transfer_digest=None, part_release_callback=None) -> dict:
+        """
+        This method uploads parts into an existing multipart upload in parallel and completes it in order
+        The upload is not aborted on failure, so that it can be resumed
+        :param parts: Iterable of bytes like parts in order, starting at first_part_number
+        :param upload_details: Bucket, Key and UploadId of the multipart upload
+        :param first_part_number: Part number of the first part in parts
+        :param completed_parts: Parts uploaded before (dicts of ETag and PartNumber), ex: by an earlier attempt
+        :param part_done_callback: Callable called with part details after each part is uploaded
+        :param transfer_digest: TransferDigest fed with every part, must have seen all parts before the first one
+        :param part_release_callback: Callable called with each part once its upload is over (also on failure),
+                                      ex: PartBufferPool.release to reuse the buffer
+        :return: Response from complete_multipart_upload, with "Digests" if transfer_digest is provided
+        """
+        # Parts read but not yet uploaded are bounded, so memory stays within (max_workers + 1) parts
+        in_flight = threading.BoundedSemaphore(self.max_workers)
+        failed = threading.Event()
+        callback_errors = list()
+
+        def part_done(future):
+            # The slot is always given back, else the producer would wait forever on in_flight
+            try:
+                if future.exception():
+                    failed.set()
+                elif part_done_callback:
+                    part_done_callback(future.result())
+            except BaseException as error:
+                callback_errors.append(error)
+                failed.set()
+            finally:
+                in_flight.release()
+
+        futures = list()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for part_number, data in enumerate(parts, start=first_part_number):
+                if part_number > S3MultipartUpload.maximum_part_count:
+                    raise ValueError(f"More than {S3MultipartUpload.maximum_part_count} parts, "
+                                     f"increase part size")
+                in_flight.acquire()
+                if failed.is_set():
+                    in_flight.release()
+                    break
+                self.raise_if_cancelled()
+                # Parts are hashed here in order, so digests need no second pass over the data
+                content_md5 = transfer_digest.update_part(data) if transfer_digest else None
+                future = executor.submit(self.__upload_part, upload_details, part_number, data, content_md5)
+                future.add_done_callback(part_done)
+                if part_release_callback:
+                    future.add_done_callback(lambda _, part=data: part_release_callback(part))
+                futures.append(future)
+
+            # Only parts before first_part_number are taken from earlier attempts, the rest are uploaded now
+            all_parts = [part for part in completed_parts or [] if part["PartNumber"] < first_part_number]
+            # Futures are kept in part order so that parts are completed in order
+            all_parts.extend(future.result() for future in futures)
+
+        if callback_errors:
+            raise callback_errors[0]
+        self.raise_if_cancelled()
+        return S3MultipartUpload.verify_etag(
+            self.s3_instance.complete_multipart_upload(MultipartUpload={"Parts": all_parts}, **upload_details),
+            transfer_digest)
+
+
+class TransferCheckpoint(object):
+    """
+    This class keeps the state of a resumable multipart transfer in a local JSON file
+    State has upload_id, part_size, completed parts (PartNumber and ETag), source_offset, which is the
+    offset in source after the last part of the contiguous run of completed parts, and source_validator
+    (ETag, Last-Modified and Content-Length of the source when the transfer was started)
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.state = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """
+        This method reads the checkpoint file
+        :return: State dict, None if there is no usable checkpoint
+        """
+        if not os.path.exists(self.file_path):
+            return None
+        try:
+            with io.open(self.file_path, "r") as checkpoint_file:
+                self.state = json.load(checkpoint_file)
+        except ValueError:
+            logging.error(f"Ignoring unreadable checkpoint {self.file_path}")
+            self.state = None
+        return self.state
+
+    def save(self, state=None):
+        """
+        This method writes the state atomically, a crash never leaves a half written checkpoint
+        :param state: New state, current state is written if not provided
+        """
+        with self.lock:
+            if state is not None:
+                self.state = state
+            temporary_file_path = f"{self.file_path}.tmp"
+            with io.open(temporary_file_path, "w") as checkpoint_file:
+                json.dump(self.state, checkpoint_file)
+            os.replace(temporary_file_path, self.file_path)
+
+    def contiguous_parts(self) -> list:
+        """
+        This method returns completed parts from part 1 up to the first missing part
+        """
+        parts = {part["PartNumber"]: part for part in self.state["parts"]}
+        contiguous = list()
+        while len(contiguous) + 1 in parts:
+            contiguous.append(parts[len(contiguous) + 1])
+        return contiguous
+
+    def record_part(self, part: dict):
+        """
+        This method records a completed part and moves source_offset forward, safe to call from many threads
+        :param part: Part details (ETag and PartNumber)
+        """
+        with self.lock:
+            self.state["parts"].append(part)
+            self.state["source_offset"] = len(self.contiguous_parts()) * self.state["part_size"]
+        self.save()
+
+    def remove(self):
+        """
+        This method removes the checkpoint once the transfer is complete
+        """
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+
+
 class CopyToS3(object):
     """
     This class provide interface to copy from local to S3
     """
+    # Session and S3 Client instance to use, created on first use from destination_aws_details
+    destination_session_instance = LazySession("destination_aws_details")
+    destination_s3_instance = LazyClient("s3", "destination_aws_details")
 
     def __init__(self, **kwargs):
         # Required variable to drive this Class, expected to be provided from parent Object
         self.destination_aws_details = None
-        self.__dict__.update(kwargs)
 
-        self.destination_session_instance = Session(aws_details=self.destination_aws_details).return_session()
+        # DEFAULT PART SIZE AND PARALLEL PART UPLOADS
+        self.part_size = 64 * 1024 ** 2
+        self.max_workers = 8
+
+        # Digests calculated while uploading, ex: ("md5", "sha256"), see S3MultipartUpload
+        self.checksum_algorithms = None
+
+        # Data is compressed while uploading and stored with this Content-Encoding ("gzip" or "zstd"), None to skip
+        self.content_encoding = None
+        self.compression_level = None
+
+        self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for CopytoS3 : {self.__dict__}")
 
+    def __upload_data(self, multipart_upload: S3MultipartUpload, data, kwargs: dict) -> dict:
+        """
+        This method uploads bytes like or file like data, compressing it if content_encoding is set
+        """
+        content_encoding = kwargs.get("content_encoding") or self.content_encoding
+        extra_arguments = dict()
+        if content_encoding:
+            if not hasattr(data, "read"):
+                data = MemoryViewReader(data)
+            # Level 0 (store only) is a valid level, so only a missing level falls back to the instance one
+            compression_level = kwargs.get("compression_level")
+            if compression_level is None:
+                compression_level = self.compression_level
+            data = CompressingReader(data, content_encoding, compression_level)
+            extra_arguments["ContentEncoding"] = content_encoding
+
+        if hasattr(data, "read"):
+            parts = S3MultipartUpload.read_in_parts(data, multipart_upload.part_size_for(0))
+        else:
+            parts = S3MultipartUpload.split_in_parts(data, multipart_upload.part_size_for(len(data)))
+        return multipart_upload.upload(parts, kwargs["destination_s3_details"]["bucket_name"],
+                                       kwargs["object_destination_path"], **extra_arguments)
+
+    @staticmethod
+    def __upload_mapped_file(multipart_upload: S3MultipartUpload, local_file_path: str, bucket_name: str,
+                             object_path: str) -> dict:
+        """
+        This method uploads a local file through a read only memory map, parts are memoryview slices of the map
+        Pages of a part are dropped once the part is uploaded, so memory stays constant whatever the file size
+        """
+        with io.open(local_file_path, "rb") as f_read:
+            file_size = os.fstat(f_read.fileno()).st_size
+            if not file_size:
+                # Empty file can not be memory mapped
+                return multipart_upload.upload([b""], bucket_name, object_path)
+
+            file_map = mmap.mmap(f_read.fileno(), 0, access=mmap.ACCESS_READ)
+            can_drop_pages = hasattr(file_map, "madvise") and hasattr(mmap, "MADV_DONTNEED")
+            if can_drop_pages:
+                file_map.madvise(mmap.MADV_SEQUENTIAL)
+            file_view = memoryview(file_map)
+            part_offsets = dict()
+
+            def iterate_parts(part_size: int):
+                for offset in range(0, file_size, part_size):
+                    part = file_view[offset:offset + part_size]
+                    part_offsets[id(part)] = offset
+                    yield part
+
+            def release_part(part):
+                offset = part_offsets.pop(id(part))
+                if can_drop_pages:
+                    # madvise needs a page aligned start, pages of a read only file map are read again if needed
+                    page_start = offset - offset % mmap.PAGESIZE
+                    file_map.madvise(mmap.MADV_DONTNEED, page_start, offset + len(part) - page_start)
+
+            try:
+                return multipart_upload.upload(iterate_parts(multipart_upload.part_size_for(file_size)),
+                                               bucket_name, object_path, part_release_callback=release_part)
+            finally:
+                file_view.release()
+                try:
+                    file_map.close()
+                except BufferError:
+                    # A part is still referenced somewhere, map is closed once it is garbage collected
+                    logging.debug(f"Memory map of {local_file_path} left for garbage collection")
+
     def copy_to_destination_s3(self, **kwargs):
         """
-        This method downloads file from local machine to s3
+        This method uploads data from local machine to s3, data above part size is uploaded in parallel parts
+        "data" is bytes like or a file like object opened in binary mode, with "content_encoding" it is compressed
+        as it is read and uploaded, compressed size is not known up front so parts are of "part_size"
+        "local_file_path" can be given instead of "data", the file is memory mapped and parts are uploaded
+        without being read into memory (read as a stream when compressed)
+        "cancel_event" (threading.Event) can be set from another thread to abort the upload
+        :return: Response of the upload, with "Digests" if checksums are asked for, None on failure
         """
         try:
-            # TODO : HANDLE MULTIPART UPLOAD
-            object_destination_address = f"s3://{kwargs['destination_s3_details']['bucket_name']}/" \
-                                         f"{kwargs['object_destination_path']}"
-            with open(object_destination_address, "wb",
-                      transport_params={"session": self.destination_session_instance}) as f_write:
-                # This expects data in bytes format
-                f_write.write(kwargs["data"])
+            multipart_upload = S3MultipartUpload(s3_instance=self.destination_s3_instance,
+                                                 part_size=kwargs.get("part_size") or self.part_size,
+                                                 max_workers=kwargs.get("max_workers") or self.max_workers,
+                                                 checksum_algorithms=kwargs.get("checksum_algorithms") or
+                                                 self.checksum_algorithms,
+                                                 cancel_event=kwargs.get("cancel_event"))
+
+            local_file_path = kwargs.get("local_file_path")
+            if not local_file_path:
+                return self.__upload_data(multipart_upload, kwargs["data"], kwargs)
+            if kwargs.get("content_encoding") or self.content_encoding:
+                # io.open, smart_open would decompress files with a compressed extension
+                with io.open(local_file_path, "rb") as f_read:
+                    return self.__upload_data(multipart_upload, f_read, kwargs)
+            return CopyToS3.__upload_mapped_file(multipart_upload, local_file_path,
+                                                 kwargs["destination_s3_details"]["bucket_name"],
+                                                 kwargs["object_destination_path"])
 
         except BaseException:
             logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
@@ -83,20 +1032,30 @@ class CopyToS3(object):
 
 class CopyFromURLtoS3(object):
     """
-    This class provide interface to copy object from one s3 to another s3
+    This class provide interface to copy object from url to s3
     """
+    # Session and S3 Client instance to use, created on first use from destination_aws_details
+    destination_session_instance = LazySession("destination_aws_details")
+    destination_s3_instance = LazyClient("s3", "destination_aws_details")
     maximum_part_size = 5 * 1024 ** 3
 
     def __init__(self, **kwargs):
         # Required variable to drive this Class, expected to be provided from parent Object
         self.destination_aws_details = None
 
-        self.__dict__.update(kwargs)
-
-        # DEFAULT CHUNK SIZE
+        # DEFAULT CHUNK SIZE (used as part size) AND PARALLEL PART UPLOADS
         self.chunk_size = 256 * 1024 ** 2
+        self.max_workers = 4
+        # Cap on memory held by part buffers, default is one buffer per upload worker and two for reading ahead
+        self.max_buffer_memory = None
 
-        self.destination_session_instance = Session(aws_details=self.destination_aws_details).return_session()
+        # Transfers are checkpointed and resumable when a WorkDirectory is provided
+        self.work_directory = None
+
+        # Digests calculated while uploading, ex: ("md5", "sha256"), see S3MultipartUpload
+        self.checksum_algorithms = None
+
+        self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for CopyFromURLtoS3 : {self.__dict__}")
 
@@ -113,25 +1072,202 @@ class CopyFromURLtoS3(object):
                 break
             yield data
 
-    def copy_from_source_url_to_destination_s3(self, **kwargs):
+    def __uploaded_parts(self, upload_details: dict):
+        """
+        This method lists parts S3 already has for a multipart upload
+        :param upload_details: Bucket, Key and UploadId of the multipart upload
+        :return: Dict of PartNumber to part details (PartNumber, ETag, Size), None if upload does not exist anymore
+        """
+        try:
+            paginator = self.destination_s3_instance.get_paginator("list_parts")
+            return {part["PartNumber"]: part for list_parts_response in paginator.paginate(**upload_details)
+                    for part in list_parts_response.get("Parts", [])}
+        except ClientError as error:
+            if error.response["Error"]["Code"] == "NoSuchUpload":
+                return None
+            raise
+
+    @staticmethod
+    def source_validator(file_object) -> dict:
+        """
+        This method returns ETag, Last-Modified and Content-Length of an HTTP source opened with smart_open
+        :return: Dict of the headers the server sent, empty if source is not HTTP
+        """
+        response = getattr(file_object, "response", None)
+        if response is None:
+            return dict()
+        return {header: response.headers[header] for header in ("ETag", "Last-Modified", "Content-Length")
+                if header in response.headers}
+
+    def __discard_checkpoint(self, checkpoint: TransferCheckpoint, upload_details: dict):
+        """
+        This method aborts the multipart upload of a checkpoint and removes the checkpoint
+        """
+        try:
+            self.destination_s3_instance.abort_multipart_upload(**upload_details)
+        except ClientError as error:
+            if error.response["Error"]["Code"] != "NoSuchUpload":
+                raise
+        checkpoint.remove()
+
+    def __buffer_pool(self, multipart_upload: S3MultipartUpload, kwargs: dict) -> PartBufferPool:
+        """
+        This method creates the buffers parts are read into, their total size never exceeds max_buffer_memory
+        """
+        max_buffer_memory = kwargs.get("max_buffer_memory") or self.max_buffer_memory
+        if max_buffer_memory:
+            if max_buffer_memory < 2 * multipart_upload.part_size:
+                raise ValueError(f"max_buffer_memory {max_buffer_memory} is less than two parts of "
+                                 f"{multipart_upload.part_size} bytes")
+            buffer_count = max_buffer_memory // multipart_upload.part_size
+        else:
+            buffer_count = multipart_upload.max_workers + 2
+        logging.debug(f"Reading in {buffer_count} buffers of {multipart_upload.part_size} bytes")
+        return PartBufferPool(multipart_upload.part_size, buffer_count)
+
+    def __resumable_copy(self, multipart_upload: S3MultipartUpload, work_directory, kwargs: dict):
         """
-        This method downloads file from url to s3
+        This method copies url to s3 with a checkpoint kept under work_directory
+        A restarted transfer for the same url and destination continues after the last contiguous completed
+        part, reading the source from that offset with an HTTP Range request
+        If the source changed since the transfer was started (ETag, Last-Modified or Content-Length differ, or
+        the If-Match read fails), the upload is aborted and the transfer starts again
         """
+        bucket_name = kwargs["destination_s3_details"]["bucket_name"]
+        object_path = kwargs["object_destination_path"]
+        checkpoint_name = hashlib.sha256(f"{kwargs['url']}|{bucket_name}|{object_path}".encode()).hexdigest()
+        checkpoint = TransferCheckpoint(os.path.join(work_directory.get_work_dir(), f"{checkpoint_name}.json"))
+
+        state = checkpoint.load()
+        if state:
+            upload_details = {"Bucket": bucket_name, "Key": object_path, "UploadId": state["upload_id"]}
+            uploaded_parts = self.__uploaded_parts(upload_details)
+            if uploaded_parts is None:
+                logging.info(f"Multipart upload {state['upload_id']} does not exist anymore, starting again")
+                state = None
+            else:
+                # S3 is the source of truth, parts in checkpoint which S3 does not have are uploaded again
+                state["parts"] = [{"ETag": part["ETag"], "PartNumber": part["PartNumber"]}
+                                  for part in state["parts"]
+                                  if part["PartNumber"] in uploaded_parts and
+                                  uploaded_parts[part["PartNumber"]]["Size"] == state["part_size"]]
+                checkpoint.save(state)
+
+        transport_params = kwargs.get('transport_params')
+        source_etag = (state or {}).get("source_validator", {}).get("ETag")
+        if source_etag and not source_etag.startswith("W/"):
+            # Every read of a resumed transfer (also the ranged ones after seek) fails if the source changed
+            transport_params = dict(transport_params or {})
+            transport_params["headers"] = dict(transport_params.get("headers") or {}, **{"If-Match": source_etag})
         try:
+            f_read = smart_open.open(kwargs["url"], "rb", transport_params=transport_params)
+        except OSError as error:
+            if getattr(getattr(error, "response", None), "status_code", None) != 412:
+                raise
+            logging.error(f"{kwargs['url']} changed since transfer was started, discarding checkpoint of "
+                          f"upload {state['upload_id']}")
+            self.__discard_checkpoint(checkpoint, {"Bucket": bucket_name, "Key": object_path,
+                                                   "UploadId": state["upload_id"]})
+            return self.__resumable_copy(multipart_upload, work_directory, kwargs)
+
+        with f_read:
+            source_validator = CopyFromURLtoS3.source_validator(f_read)
+            if state and state.get("source_validator") != source_validator:
+                logging.error(f"{kwargs['url']} changed since transfer was started "
+                              f"({state.get('source_validator')} -> {source_validator}), discarding checkpoint of "
+                              f"upload {state['upload_id']}")
+                self.__discard_checkpoint(checkpoint, {"Bucket": bucket_name, "Key": object_path,
+                                                       "UploadId": state["upload_id"]})
+                state = None
+
+            if not state:
+                upload_id = self.destination_s3_instance.create_multipart_upload(Bucket=bucket_name,
+                                                                                 Key=object_path)["UploadId"]
+                checkpoint.save({"url": kwargs["url"], "bucket_name": bucket_name, "object_path": object_path,
+                                 "upload_id": upload_id, "part_size": multipart_upload.part_size,
+                                 "parts": list(), "source_offset": 0, "source_validator": source_validator})
+
+            # Resumed transfer keeps the part size it was started with
+            multipart_upload.part_size = checkpoint.state["part_size"]
+            completed_parts = checkpoint.contiguous_parts()
+            source_offset = len(completed_parts) * checkpoint.state["part_size"]
+            upload_details = {"Bucket": bucket_name, "Key": object_path,
+                              "UploadId": checkpoint.state["upload_id"]}
+
+            if source_offset:
+                logging.info(f"Resuming {kwargs['url']} from part {len(completed_parts) + 1} "
+                             f"(offset {source_offset})")
+                if f_read.seekable():
+                    f_read.seek(source_offset)
+                else:
+                    # Server does not support Range, skipped bytes are read but not uploaded again
+                    remaining_bytes = source_offset
+                    while remaining_bytes:
+                        skipped_data = f_read.read(min(remaining_bytes, multipart_upload.part_size))
+                        if not skipped_data:
+                            break
+                        remaining_bytes -= len(skipped_data)
+
+            buffer_pool = self.__buffer_pool(multipart_upload, kwargs)
+            part_reader = buffer_pool.read_parts(f_read)
+            try:
+                parts = part_reader
+                if not completed_parts:
+                    # Empty source can not be completed as multipart upload
+                    first_part = next(parts, b"")
+                    if not first_part:
+                        self.destination_s3_instance.abort_multipart_upload(**upload_details)
+                        response = self.destination_s3_instance.put_object(Bucket=bucket_name, Key=object_path,
+                                                                           Body=b"")
+                        checkpoint.remove()
+                        return response
+                    parts = itertools.chain([first_part], parts)
+
+                # Digests need every byte, so they are only calculated when nothing was skipped
+                response = multipart_upload.upload_parts(
+                    parts, upload_details, first_part_number=len(completed_parts) + 1,
+                    completed_parts=completed_parts, part_done_callback=checkpoint.record_part,
+                    transfer_digest=None if completed_parts else multipart_upload.new_transfer_digest(),
+                    part_release_callback=buffer_pool.release)
+            finally:
+                part_reader.close()
+        checkpoint.remove()
+        return response
 
+    def copy_from_source_url_to_destination_s3(self, **kwargs):
+        """
+        This method downloads file from url to s3, chunks are uploaded as parallel parts
+        Memory used for chunks is bounded by "max_buffer_memory"
+        With a "work_directory" the transfer is checkpointed and resumed after a restart
+        :return: Response of the upload, with "Digests" if checksums are asked for (and the transfer was not
+                 resumed), None on failure
+        """
+        try:
             chunk_size = kwargs["chunk_size"] if kwargs.get("chunk_size") else self.chunk_size
-            object_destination_address = f"s3://{kwargs['destination_s3_details']['bucket_name']}/" \
-                                         f"{kwargs['object_destination_path']}"
+            chunk_size = min(max(chunk_size, S3MultipartUpload.minimum_part_size), CopyFromURLtoS3.maximum_part_size)
+
+            multipart_upload = S3MultipartUpload(s3_instance=self.destination_s3_instance,
+                                                 part_size=chunk_size,
+                                                 max_workers=kwargs.get("max_workers") or self.max_workers,
+                                                 checksum_algorithms=kwargs.get("checksum_algorithms") or
+                                                 self.checksum_algorithms)
+
+            work_directory = kwargs.get("work_directory") or self.work_directory
+            if work_directory:
+                return self.__resumable_copy(multipart_upload, work_directory, kwargs)
+
             transport_params = kwargs.get('transport_params')
-            with open(kwargs["url"], "rb", transport_params = transport_params) as f_read:
-                # TODO : Handle multipart_upload and check based on AWS constraints
-                # if f_read.content_length >= CopyFromURLtoS3.maximum_part_size:
-                # if f_read.content_length >= self.chunk_size:
-                with open(object_destination_address, "wb",
-                          transport_params={"session": self.destination_session_instance,
-                                            "min_part_size": chunk_size}) as f_write:
-                    for data_line in CopyFromURLtoS3.read_in_chunks(f_read, chunk_size):
-                        f_write.write(data_line)
+            with smart_open.open(kwargs["url"], "rb", transport_params=transport_params) as f_read:
+                # Reader thread fills pooled buffers while parts are uploaded, a buffer is reused once its part
+                # is uploaded, so nothing is copied between read and upload and memory stays bounded
+                buffer_pool = self.__buffer_pool(multipart_upload, kwargs)
+                parts = buffer_pool.read_parts(f_read)
+                try:
+                    return multipart_upload.upload(parts, kwargs["destination_s3_details"]["bucket_name"],
+                                                   kwargs["object_destination_path"],
+                                                   part_release_callback=buffer_pool.release)
+                finally:
+                    parts.close()
 
         except BaseException:
             logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
@@ -141,65 +1277,348 @@ class CopyObjectFromS3ToS3(object):
     """
     This class provide interface to copy object from one s3 to another s3
     """
+    # Sessions and S3 Client instances to use, created on first use, destination one is used for server side copy
+    source_session_instance = LazySession("source_aws_details")
+    destination_session_instance = LazySession("destination_aws_details")
+    source_s3_instance = LazyClient("s3", "source_aws_details")
+    destination_s3_instance = LazyClient("s3", "destination_aws_details")
+    # AWS limits for CopyObject and UploadPartCopy
+    maximum_copy_object_size = 5 * 1024 ** 3
+    minimum_part_size = 5 * 1024 ** 2
+    maximum_part_count = 10000
+    # Attributes of source object (from head_object) which a multipart upload does not copy by itself
+    copied_attributes = ("ContentType", "ContentEncoding", "CacheControl", "ContentDisposition", "ContentLanguage",
+                         "Expires", "WebsiteRedirectLocation", "StorageClass", "ServerSideEncryption", "SSEKMSKeyId",
+                         "BucketKeyEnabled")
 
     def __init__(self, **kwargs):
         # Required variable to drive this Class, expected to be provided from parent Object
         self.source_aws_details = None
         self.destination_aws_details = None
 
-        self.__dict__.update(kwargs)
+        # Server side copy is used whenever source and destination share credentials
+        self.server_side_copy = True
+        # DEFAULT PART SIZE AND PARALLEL PART COPIES for objects above maximum_copy_object_size
+        self.part_size = 512 * 1024 ** 2
+        self.max_workers = 8
 
-        self.source_session_instance = Session(aws_details=self.source_aws_details).return_session()
-        self.destination_session_instance = Session(aws_details=self.destination_aws_details).return_session()
+        # Digests calculated while streaming, ex: ("md5", "sha256"), see S3MultipartUpload
+        self.checksum_algorithms = None
+
+        self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for CopyObjectFromS3ToS3 : {self.__dict__}")
 
+    def is_server_side_copy_possible(self) -> bool:
+        """
+        Server side copy needs both the buckets to be reachable from one set of credentials
+        :return: Boolean condition based on whether server side copy can be used or not
+        """
+        return bool(self.server_side_copy) and self.source_aws_details == self.destination_aws_details
+
+    @staticmethod
+    def object_attributes(s3_instance, copy_source: dict, head_response: dict) -> dict:
+        """
+        This method returns arguments for create_multipart_upload which give the copy the attributes of its source
+        :param s3_instance: S3 client which can read tags of the source object
+        :param copy_source: Bucket and Key of the source object
+        :param head_response: head_object response of the source object
+        :return: Metadata, content headers, storage class, encryption and Tagging
+        """
+        attributes = {"Metadata": head_response.get("Metadata", {})}
+        attributes.update({attribute: head_response[attribute] for attribute in CopyObjectFromS3ToS3.copied_attributes
+                           if head_response.get(attribute)})
+        if head_response.get("TagCount"):
+            tag_set = s3_instance.get_object_tagging(**copy_source)["TagSet"]
+            attributes["Tagging"] = urlencode([(tag["Key"], tag["Value"]) for tag in tag_set])
+        return attributes
+
+    def __copy_part(self, upload_details: dict, part_number: int, byte_range: str, cancel_event=None) -> dict:
+        """
+        This method copies one part of the source object into the multipart upload
+        :param upload_details: Bucket, Key, UploadId and CopySource of the multipart upload
+        :param part_number: Part number of this part (starts from 1)
+        :param byte_range: Byte range of source object in "bytes=first-last" format
+        :param cancel_event: threading.Event, part is not copied once it is set
+        :return: Part details required to complete the multipart upload
+        """
+        if cancel_event is not None and cancel_event.is_set():
+            raise InterruptedError("Multipart copy cancelled")
+        response = self.destination_s3_instance.upload_part_copy(PartNumber=part_number,
+                                                                 CopySourceRange=byte_range,
+                                                                 **upload_details)
+        return {"ETag": response["CopyPartResult"]["ETag"], "PartNumber": part_number}
+
+    def __multipart_copy(self, copy_source: dict, bucket_name: str, object_path: str, head_response: dict,
+                         cancel_event=None):
+        """
+        This method copies object using UploadPartCopy with parts copied in parallel
+        :param copy_source: Bucket and Key of the source object
+        :param bucket_name: Destination bucket name
+        :param object_path: Destination object path
+        :param head_response: head_object response of the source object
+        :param cancel_event: threading.Event, once set remaining parts are skipped and the upload is aborted
+        """
+        object_size = head_response["ContentLength"]
+        part_size = max(self.part_size, CopyObjectFromS3ToS3.minimum_part_size,
+                        math.ceil(object_size / CopyObjectFromS3ToS3.maximum_part_count))
+        part_count = math.ceil(object_size / part_size)
+
+        create_arguments = CopyObjectFromS3ToS3.object_attributes(self.destination_s3_instance, copy_source,
+                                                                  head_response)
+        upload_id = self.destination_s3_instance.create_multipart_upload(Bucket=bucket_name, Key=object_path,
+                                                                         **create_arguments)["UploadId"]
+
+        # Every part is copied from the version that was sized, a source overwritten meanwhile fails the copy
+        upload_details = {"Bucket": bucket_name, "Key": object_path, "UploadId": upload_id,
+                          "CopySource": copy_source, "CopySourceIfMatch": head_response["ETag"]}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(self.__copy_part, upload_details, part_number + 1,
+                                           f"bytes={part_number * part_size}-"
+                                           f"{min((part_number + 1) * part_size, object_size) - 1}",
+                                           cancel_event)
+                           for part_number in range(part_count)]
+                try:
+                    for future in as_completed(futures):
+                        future.result()
+                except BaseException:
+                    # Parts not started yet are dropped, the upload is aborted anyway
+                    executor.shutdown(cancel_futures=True)
+                    raise
+                # Futures are kept in part order so that parts are completed in order
+                parts = [future.result() for future in futures]
+
+            return self.destination_s3_instance.complete_multipart_upload(Bucket=bucket_name, Key=object_path,
+                                                                          UploadId=upload_id,
+                                                                          MultipartUpload={"Parts": parts})
+        except BaseException:
+            logging.error(f"Aborting multipart copy of s3://{bucket_name}/{object_path}")
+            self.destination_s3_instance.abort_multipart_upload(Bucket=bucket_name, Key=object_path,
+                                                                UploadId=upload_id)
+            raise
+
+    def server_side_copy_from_source_to_destination_s3(self, **kwargs) -> dict:
+        """
+        This method copies object inside S3 using CopyObject or UploadPartCopy without downloading it
+        :return: Response from copy_object or complete_multipart_upload
+        """
+        copy_source = {"Bucket": kwargs["source_s3_details"]["bucket_name"],
+                       "Key": kwargs["object_original_path"]}
+        bucket_name = kwargs["destination_s3_details"]["bucket_name"]
+        object_path = kwargs["object_destination_path"]
+
+        head_response = self.destination_s3_instance.head_object(**copy_source)
+        logging.debug(f"Size of object to be copied : {head_response['ContentLength']}")
+
+        if head_response["ContentLength"] <= CopyObjectFromS3ToS3.maximum_copy_object_size:
+            return self.destination_s3_instance.copy_object(CopySource=copy_source, Bucket=bucket_name,
+                                                            Key=object_path)
+        return self.__multipart_copy(copy_source, bucket_name, object_path, head_response,
+                                     kwargs.get("cancel_event"))
+
+    def streamed_copy_from_source_to_destination_s3(self, **kwargs) -> dict:
+        """
+        This method copies object by streaming it through this machine in parallel parts, for buckets which can
+        not be reached from one set of credentials. Digests are calculated on the way if checksum_algorithms is set
+        :return: Response from put_object or complete_multipart_upload (with "Digests" if checksums are asked for)
+        """
+        multipart_upload = S3MultipartUpload(s3_instance=self.destination_s3_instance,
+                                             max_workers=self.max_workers,
+                                             checksum_algorithms=kwargs.get("checksum_algorithms") or
+                                             self.checksum_algorithms,
+                                             cancel_event=kwargs.get("cancel_event"))
+        copy_source = {"Bucket": kwargs["source_s3_details"]["bucket_name"],
+                       "Key": kwargs["object_original_path"]}
+        with S3ObjectReader(self.source_s3_instance, copy_source["Bucket"], copy_source["Key"]) as f_read:
+            part_size = multipart_upload.part_size_for(f_read.size)
+            # Ranged GETs of one part each, so every part is read with a single request
+            f_read.range_size = part_size
+            extra_arguments = CopyObjectFromS3ToS3.object_attributes(self.source_s3_instance, copy_source,
+                                                                     f_read.head_response)
+            # KMS key of the source account is usually not usable by the destination credentials,
+            # destination encrypts with its default key for aws:kms instead
+            extra_arguments.pop("SSEKMSKeyId", None)
+            return multipart_upload.upload(S3MultipartUpload.read_in_parts(f_read, part_size),
+                                           kwargs["destination_s3_details"]["bucket_name"],
+                                           kwargs["object_destination_path"], **extra_arguments)
+
     def copy_from_source_to_destination_s3(self, **kwargs):
         """
-        This method downloads file from one s3 to another s3
+        This method copies file from one s3 to another s3
+        Server side copy is used when possible, otherwise data is streamed through this machine in parallel
+        parts, with digests calculated on the way if checksum_algorithms is set
+        "cancel_event" (threading.Event) can be set from another thread to abort a multipart copy or upload
+        :return: Response of the copy or upload (with "Digests" when streamed with checksums), False on failure
         """
         try:
-            object_original_address = f"s3://{kwargs['source_s3_details']['bucket_name']}/" \
-                                      f"{kwargs['object_original_path']}"
-            object_destination_address = f"s3://{kwargs['destination_s3_details']['bucket_name']}/" \
-                                         f"{kwargs['object_destination_path']}"
-            with open(object_original_address, "rb",
-                      transport_params={"session": self.source_session_instance}) as f_read:
-                with open(object_destination_address, "wb",
-                          transport_params={"session": self.destination_session_instance}) as f_write:
-                    for data_line in f_read:
-                        f_write.write(data_line)
+            if self.is_server_side_copy_possible():
+                return self.server_side_copy_from_source_to_destination_s3(**kwargs)
+            return self.streamed_copy_from_source_to_destination_s3(**kwargs)
 
         except BaseException:
             logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
+        return False
 
 
 class CopyObjectFromS3ToLocal(object):
     """
     This Class is to data handle from s3 to local
     """
+    # Session and S3 Client instance to use, created on first use from aws_details
+    session_instance = LazySession()
+    s3_instance = LazyClient("s3")
 
     def __init__(self, **kwargs):
         # Required variable to drive this Class, expected to be provided from parent Object
         self.aws_details = None
-        self.__dict__.update(kwargs)
 
-        self.session_instance = Session(aws_details=self.aws_details).return_session()
+        # DEFAULT RANGE SIZE, PARALLEL RANGE DOWNLOADS AND ATTEMPTS PER RANGE
+        self.range_size = 64 * 1024 ** 2
+        self.max_workers = 8
+        self.max_attempts = 3
+
+        # Objects stored with Content-Encoding gzip or zstd are written decompressed (in one streamed GET)
+        self.decode_content = True
+        # Downloaded file is read back and its md5 compared with the ETag, when the ETag is an md5 of the data
+        self.verify_md5 = True
+
+        self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for CopyObjectFromS3ToLocal : {self.__dict__}")
 
-    def download_content(self, **kwargs):
+    def __download_range(self, file_descriptor: int, object_details: dict, first_byte: int, last_byte: int,
+                         cancel_event=None):
+        """
+        This method downloads one byte range and writes it at its own offset in the local file
+        :param file_descriptor: File descriptor of preallocated local file
+        :param object_details: Bucket, Key and IfMatch (ETag) of the object
+        :param first_byte: First byte of the range
+        :param last_byte: Last byte of the range (inclusive)
+        :param cancel_event: threading.Event, range is not downloaded once it is set
+        :return: Number of bytes written
         """
-        This method downloads file from local machine to s3 and then prints it
+        for attempt in range(1, self.max_attempts + 1):
+            if cancel_event is not None and cancel_event.is_set():
+                raise InterruptedError("Download cancelled")
+            try:
+                response = self.s3_instance.get_object(Range=f"bytes={first_byte}-{last_byte}", **object_details)
+                offset = first_byte
+                for chunk in response["Body"].iter_chunks(chunk_size=1024 ** 2):
+                    chunk_view = memoryview(chunk)
+                    while chunk_view:
+                        written = os.pwrite(file_descriptor, chunk_view, offset)
+                        chunk_view = chunk_view[written:]
+                        offset += written
+                if offset != last_byte + 1:
+                    raise IOError(f"Range bytes={first_byte}-{last_byte} ended at {offset}")
+                return offset - first_byte
+            except ClientError as error:
+                # Object changed while downloading, retrying the range would mix two versions
+                if error.response["Error"]["Code"] in ("PreconditionFailed", "412"):
+                    raise
+                if attempt == self.max_attempts:
+                    raise
+                logging.warning(f"Retrying range bytes={first_byte}-{last_byte} (attempt {attempt}) : {error}")
+            except Exception as error:
+                if attempt == self.max_attempts:
+                    raise
+                logging.warning(f"Retrying range bytes={first_byte}-{last_byte} (attempt {attempt}) : {error}")
+
+    def __download_decoded(self, object_details: dict, local_file_path: str, content_encoding: str,
+                           cancel_event=None):
         """
+        This method streams a compressed object through a decompressor into the local file
+        Compressed byte ranges can not be decompressed on their own, so the object is read in one GET
+        """
+        body = self.s3_instance.get_object(**object_details)["Body"]
         try:
-            object_address = f"s3://{kwargs['s3_details']['bucket_name']}/" \
-                             f"{kwargs['object_path']}"
+            with io.open(local_file_path, "wb") as f_write:
+                for data in ContentEncoding.decompress_chunks(body.iter_chunks(chunk_size=1024 ** 2),
+                                                              content_encoding):
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise InterruptedError("Download cancelled")
+                    f_write.write(data)
+        except BaseException:
+            if os.path.exists(local_file_path):
+                os.remove(local_file_path)
+            raise
+        finally:
+            body.close()
 
-            with open(object_address, "rb", transport_params={"session": self.session_instance}) as s3_file:
-                with open(kwargs["local_file_path"], "wb") as local_file:
-                    for line in s3_file:
-                        local_file.write(line)
+    @staticmethod
+    def __file_md5(file_descriptor: int, size: int) -> str:
+        """
+        This method returns md5 of the first size bytes of a file, read in chunks
+        """
+        md5 = hashlib.md5()
+        offset = 0
+        while offset < size:
+            data = os.pread(file_descriptor, min(16 * 1024 ** 2, size - offset), offset)
+            if not data:
+                break
+            md5.update(data)
+            offset += len(data)
+        return md5.hexdigest()
+
+    def download_content(self, **kwargs):
+        """
+        This method downloads file from s3 to local machine using parallel byte range requests
+        Objects with a supported Content-Encoding are decompressed on the way unless decode_content is False
+        "cancel_event" (threading.Event) can be set from another thread to stop it, partial file is removed
+        """
+        try:
+            bucket_name = kwargs["s3_details"]["bucket_name"]
+            object_path = kwargs["object_path"]
+            local_file_path = kwargs["local_file_path"]
+            range_size = kwargs.get("range_size") or self.range_size
+
+            head_response = self.s3_instance.head_object(Bucket=bucket_name, Key=object_path)
+            object_size = head_response["ContentLength"]
+            # Every range is pinned to the same ETag, so all of them come from one version of the object
+            object_details = {"Bucket": bucket_name, "Key": object_path, "IfMatch": head_response["ETag"]}
+
+            content_encoding = head_response.get("ContentEncoding")
+            if self.decode_content and content_encoding in ContentEncoding.supported:
+                self.__download_decoded(object_details, local_file_path, content_encoding,
+                                        kwargs.get("cancel_event"))
+                logging.debug(f"Downloaded and decompressed s3://{bucket_name}/{object_path} ({object_size} "
+                              f"bytes {content_encoding}, ETag {head_response['ETag']}) to {local_file_path}")
+                return
+
+            file_descriptor = os.open(local_file_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                os.ftruncate(file_descriptor, object_size)
+
+                with ThreadPoolExecutor(max_workers=kwargs.get("max_workers") or self.max_workers) as executor:
+                    futures = [executor.submit(self.__download_range, file_descriptor, object_details,
+                                               first_byte, min(first_byte + range_size, object_size) - 1,
+                                               kwargs.get("cancel_event"))
+                               for first_byte in range(0, object_size, range_size)]
+                    written_bytes = 0
+                    try:
+                        for future in futures:
+                            written_bytes += future.result()
+                    except BaseException:
+                        executor.shutdown(cancel_futures=True)
+                        raise
+
+                # File was preallocated to object_size, so its size tells nothing, bytes written by ranges do
+                if written_bytes != object_size:
+                    raise IOError(f"Size mismatch for {local_file_path} : {written_bytes} != {object_size}")
+                etag = head_response["ETag"].strip('"')
+                if self.verify_md5 and "-" not in etag and S3MultipartUpload.has_md5_etag(head_response):
+                    local_md5 = CopyObjectFromS3ToLocal.__file_md5(file_descriptor, object_size)
+                    if local_md5 != etag:
+                        raise IOError(f"md5 mismatch for {local_file_path} : {local_md5} != ETag {etag}")
+            except BaseException:
+                os.close(file_descriptor)
+                os.remove(local_file_path)
+                raise
+            os.close(file_descriptor)
+
+            logging.debug(f"Downloaded s3://{bucket_name}/{object_path} ({object_size} bytes, "
+                          f"ETag {head_response['ETag']}) to {local_file_path}")
 
         except BaseException:
             logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
@@ -209,93 +1628,318 @@ class S3DeleteObject(object):
     """
         This class provide wrapper to delete S3 objects
     """
+    # S3 Client instance to use, created on first use from aws_details
+    s3_instance = LazyClient("s3")
+    # AWS limit of keys in one DeleteObjects request
+    maximum_keys_per_request = 1000
 
     def __init__(self, **kwargs):
 
         # Required variables to drive this Object
         self.aws_details = None
 
+        # DEFAULT PARALLEL DeleteObjects REQUESTS for bulk_delete_from_s3
+        self.max_workers = 8
+
         self.__dict__.update(kwargs)
 
         # Variable received later when method called
         self.s3_details = None
 
-        # S3 Client instance to use
-        self.s3_instance = Client(aws_details=self.aws_details).return_client(service_name="s3")
-
         logging.debug(f"Instance variables for S3DeleteObject : {self.__dict__}")
 
     @staticmethod
     def aws_api_response_handler(response):
         """
-        This method recursively add data into object Dictionary
-        :param response: list_objects_response from boto3 s3 client
+        This method logs the result of delete_object
+        :param response: delete_object response from boto3 s3 client
         """
 
         if response["ResponseMetadata"]["HTTPStatusCode"] == 204:
             logging.info("Deleted successfully")
-        logging.error(f"Response from delete : {response['ResponseMetadata']}")
+        else:
+            logging.error(f"Response from delete : {response['ResponseMetadata']}")
 
     def delete_from_s3(self, **kwargs):
         """
-        Driving method which will get contents of all the objects in s3
-        :return: Returns object dict containing details about s3
+        Driving method which will delete one object from s3
         """
         self.s3_details = kwargs["s3_details"]
 
         try:
-            # Required parameter to call list_objects_v2
             S3DeleteObject.aws_api_response_handler(
                 self.s3_instance.delete_object(Bucket=self.s3_details["bucket_name"],
                                                Key=kwargs["object_path"]))
         except BaseException:
             logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
 
+    def __delete_batch(self, bucket_name: str, object_paths: list) -> dict:
+        """
+        This method deletes one batch of keys using DeleteObjects
+        :param bucket_name: Bucket name
+        :param object_paths: List of at most maximum_keys_per_request keys
+        :return: Report of this batch with "deleted" keys and "errors" per key
+        """
+        try:
+            # Quiet mode only returns the keys which could not be deleted
+            response = self.s3_instance.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": object_path} for object_path in object_paths], "Quiet": True})
+            errors = {error["Key"]: {"Code": error.get("Code"), "Message": error.get("Message")}
+                      for error in response.get("Errors", [])}
+        except Exception as error:
+            logging.error(f"DeleteObjects failed for {len(object_paths)} keys : {error}")
+            errors = {object_path: {"Code": type(error).__name__, "Message": str(error)}
+                      for object_path in object_paths}
+        return {"deleted": [object_path for object_path in object_paths if object_path not in errors],
+                "errors": errors}
+
+    def __iterate_object_paths(self, bucket_name: str, prefix: str):
+        """
+        Generator which yields every key under the prefix, including empty objects
+        :param bucket_name: Bucket name
+        :param prefix: Prefix to be listed
+        """
+        paginator = self.s3_instance.get_paginator("list_objects_v2")
+        for list_objects_response in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+            for item in list_objects_response.get("Contents", []):
+                yield item["Key"]
+
+    def bulk_delete_from_s3(self, **kwargs) -> dict:
+        """
+        Driving method which will delete many objects from s3 using batches of DeleteObjects in parallel
+        Keys are taken from "object_paths" (any iterable, consumed lazily) or from everything under "prefix"
+        :return: Report with list of "deleted" keys and "errors" as dict of key to Code and Message
+        """
+        self.s3_details = kwargs["s3_details"]
+        bucket_name = self.s3_details["bucket_name"]
+
+        report = {"deleted": list(), "errors": dict()}
+        try:
+            if "object_paths" in kwargs:
+                object_paths = iter(kwargs["object_paths"])
+            else:
+                object_paths = self.__iterate_object_paths(bucket_name, kwargs["prefix"])
+
+            max_workers = kwargs.get("max_workers") or self.max_workers
+            # Batches waiting to be deleted are bounded, so keys are not all read into memory up front
+            in_flight = threading.BoundedSemaphore(max_workers * 2)
+            report_lock = threading.Lock()
+
+            def batch_done(future):
+                batch_report = future.result()
+                with report_lock:
+                    report["deleted"].extend(batch_report["deleted"])
+                    report["errors"].update(batch_report["errors"])
+                in_flight.release()
+
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                while True:
+                    batch = list(itertools.islice(object_paths, S3DeleteObject.maximum_keys_per_request))
+                    if not batch:
+                        break
+                    in_flight.acquire()
+                    executor.submit(self.__delete_batch, bucket_name, batch).add_done_callback(batch_done)
+
+            logging.info(f"Bulk delete in bucket {bucket_name} : {len(report['deleted'])} deleted, "
+                         f"{len(report['errors'])} failed")
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
+        return report
+
 
 class MoveObjectFromS3ToS3(object):
     """
     This class handles all the s3 object move
     """
+    # Checksums returned by head_object with ChecksumMode, strongest first
+    checksums = ("ChecksumSHA256", "ChecksumSHA1", "ChecksumCRC64NVME", "ChecksumCRC32C", "ChecksumCRC32")
 
     def __init__(self, **kwargs):
         # Required variable to drive this Class, expected to be provided from parent Object
         self.source_aws_details = None
         self.destination_aws_details = None
 
+        # DEFAULT PARALLEL COPIES for move_prefix_from_source_to_destination_s3
+        self.max_workers = 16
+
         self.__dict__.update(kwargs)
 
+        # Copy and delete instances are reused by every move, so sessions and clients are created once
+        self.copy_instance = CopyObjectFromS3ToS3(source_aws_details=self.source_aws_details,
+                                                  destination_aws_details=self.destination_aws_details)
+        self.delete_instance = S3DeleteObject(aws_details=self.source_aws_details)
+
         logging.debug(f"Instance variables for MoveObjectFromS3ToS3 : {self.__dict__}")
 
     def move_from_source_to_destination_s3(self, **kwargs):
         """
-        This method downloads file from one s3 to another s3
+        This method moves file from one s3 to another s3, source is deleted only if the copy succeeded
         """
         try:
-            CopyObjectFromS3ToS3(source_aws_details=self.source_aws_details,
-                                 destination_aws_details=self.destination_aws_details). \
-                copy_from_source_to_destination_s3(
-                source_s3_details=kwargs["source_s3_details"],
-                object_original_path=kwargs["object_original_path"],
-                destination_s3_details=kwargs["destination_s3_details"],
-                object_destination_path=kwargs["object_destination_path"])
-
-            S3DeleteObject(aws_details=self.source_aws_details). \
-                delete_from_s3(s3_details=kwargs["source_s3_details"],
-                               object_path=kwargs["object_original_path"])
+            if self.copy_instance.copy_from_source_to_destination_s3(
+                    source_s3_details=kwargs["source_s3_details"],
+                    object_original_path=kwargs["object_original_path"],
+                    destination_s3_details=kwargs["destination_s3_details"],
+                    object_destination_path=kwargs["object_destination_path"]):
+                self.delete_instance.delete_from_s3(s3_details=kwargs["source_s3_details"],
+                                                    object_path=kwargs["object_original_path"])
+            else:
+                logging.error(f"Copy failed, source {kwargs['object_original_path']} is not deleted")
         except BaseException:
             logging.error(f"Uncaught exception in s3.py: {traceback.format_exc()}")
 
+    def __iterate_prefix_pairs(self, source_bucket_name: str, original_prefix: str, destination_prefix: str):
+        """
+        Generator which yields (original path, destination path, source item) for every key under the prefix
+        :param source_bucket_name: Source bucket name
+        :param original_prefix: Prefix in source bucket
+        :param destination_prefix: Prefix in destination bucket which replaces original_prefix
+        """
+        paginator = self.delete_instance.s3_instance.get_paginator("list_objects_v2")
+        for list_objects_response in paginator.paginate(Bucket=source_bucket_name, Prefix=original_prefix):
+            for item in list_objects_response.get("Contents", []):
+                yield item["Key"], destination_prefix + item["Key"][len(original_prefix):], item
+
+    def __copy_and_verify(self, source_s3_details: dict, destination_s3_details: dict,
+                          object_original_path: str, object_destination_path: str, source_item=None) -> bool:
+        """
+        This method copies one object and verifies the destination against the source
+        Size must match, ETag must match too unless one of them is a multipart ETag or is not an md5 (SSE-KMS or
+        SSE-C), then a checksum both objects have (ChecksumSHA256, ChecksumCRC32...) is compared. Without one,
+        the object is verified by size only, which is logged
+        :param source_item: Listing entry of source object, head_object is used when not provided
+        :return: True if the destination is verified, False otherwise
+        """
+        if not self.copy_instance.copy_from_source_to_destination_s3(
+                source_s3_details=source_s3_details, object_original_path=object_original_path,
+                destination_s3_details=destination_s3_details, object_destination_path=object_destination_path):
+            return False
+        try:
+            if source_item is None:
+                source_head = self.delete_instance.s3_instance.head_object(
+                    Bucket=source_s3_details["bucket_name"], Key=object_original_path)
+                source_item = {"Size": source_head["ContentLength"], "ETag": source_head["ETag"]}
+            destination_head = self.copy_instance.destination_s3_instance.head_object(
+                Bucket=destination_s3_details["bucket_name"], Key=object_destination_path)
+
+            if destination_head["ContentLength"] != source_item["Size"]:
+                logging.error(f"Size mismatch after copy of {object_original_path}")
+                return False
+            if source_item["ETag"] == destination_head["ETag"]:
+                return True
+
+            # ETags differ, which is only a mismatch when both are single part md5 of the data
+            source_head = self.delete_instance.s3_instance.head_object(
+                Bucket=source_s3_details["bucket_name"], Key=object_original_path, ChecksumMode="ENABLED")
+            if "-" not in source_item["ETag"] + destination_head["ETag"] and \
+                    S3MultipartUpload.has_md5_etag(source_head) and S3MultipartUpload.has_md5_etag(destination_head):
+                logging.error(f"ETag mismatch after copy of {object_original_path}")
+                return False
+            destination_head = self.copy_instance.destination_s3_instance.head_object(
+                Bucket=destination_s3_details["bucket_name"], Key=object_destination_path, ChecksumMode="ENABLED")
+            for checksum in MoveObjectFromS3ToS3.checksums:
+                if not source_head.get(checksum) or not destination_head.get(checksum):
+                    continue
+                if source_head[checksum] == destination_head[checksum]:
+                    return True
+                # Checksums of multipart objects ("-" part count suffix) depend on part sizes, they may differ
+                if "-" not in source_head[checksum] + destination_head[checksum]:
+                    logging.error(f"{checksum} mismatch after copy of {object_original_path}")
+                    return False
+            logging.warning(f"No comparable checksum for {object_original_path}, copy verified by size only")
+            return True
+        except BaseException:
+            logging.error(f"Verification failed for {object_original_path} : {traceback.format_exc()}")
+            return False
+
+    def move_prefix_from_source_to_destination_s3(self, **kwargs) -> dict:
+        """
+        This method moves many objects from one s3 to another s3
+        Objects are taken from everything under "object_original_prefix" (moved under
+        "object_destination_prefix") or from "object_paths", an iterable of (original path, destination path).
+        Copies run in parallel, sources are deleted in batches only after their copy is verified.
+        :return: Report with "moved" source keys, "copy_errors" source keys and "delete_errors" per source key
+        """
+        source_s3_details = kwargs["source_s3_details"]
+        destination_s3_details = kwargs["destination_s3_details"]
+
+        report = {"moved": list(), "copy_errors": list(), "delete_errors": dict()}
+        verified_paths = list()
+
+        def delete_verified_paths():
+            delete_report = self.delete_instance.bulk_delete_from_s3(s3_details=source_s3_details,
+                                                                     object_paths=verified_paths)
+            report["moved"].extend(delete_report["deleted"])
+            report["delete_errors"].update(delete_report["errors"])
+            verified_paths.clear()
+
+        def collect(futures):
+            for future in futures:
+                object_original_path, verified = future.result()
+                if verified:
+                    verified_paths.append(object_original_path)
+                else:
+                    report["copy_errors"].append(object_original_path)
+            if len(verified_paths) >= S3DeleteObject.maximum_keys_per_request:
+                delete_verified_paths()
+
+        try:
+            if "object_paths" in kwargs:
+                pairs = ((object_original_path, object_destination_path, None)
+                         for object_original_path, object_destination_path in kwargs["object_paths"])
+            else:
+                pairs = self.__iterate_prefix_pairs(source_s3_details["bucket_name"],
+                                                    kwargs["object_original_prefix"],
+                                                    kwargs["object_destination_prefix"])
+
+            def copy_pair(object_original_path, object_destination_path, source_item):
+                return object_original_path, self.__copy_and_verify(source_s3_details, destination_s3_details,
+                                                                    object_original_path, object_destination_path,
+                                                                    source_item)
+
+            max_workers = kwargs.get("max_workers") or self.max_workers
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                for object_original_path, object_destination_path, source_item in pairs:
+                    # Pending copies are bounded, so a large prefix is not all listed into memory up front
+                    if len(pending) >= max_workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending.add(executor.submit(copy_pair, object_original_path, object_destination_path,
+                                                source_item))
+                collect(wait(pending).done)
+
+            if verified_paths:
+                delete_verified_paths()
+
+            logging.info(f"Bulk move from bucket {source_s3_details['bucket_name']} : {len(report['moved'])} moved, "
+                         f"{len(report['copy_errors'])} copy errors, {len(report['delete_errors'])} delete errors")
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3.py: {traceback.format_exc()}")
+        return report
+
 
 class S3ObjectList(object):
     """
         This class creates dict of s3 objects with some basic filter
     """
+    # S3 Client instance to use, created on first use from aws_details
+    s3_instance = LazyClient("s3")
 
     def __init__(self, **kwargs):
 
         # Required variables to drive this Object
         self.aws_details = None
 
+        # DEFAULT PARALLEL SHARD LISTINGS for check_contents_of_s3_in_parallel
+        self.max_workers = 16
+
+        # Empty (0B) objects are skipped unless asked for
+        self.include_empty_objects = False
+
         self.__dict__.update(kwargs)
 
         # Variable received later when method called
@@ -303,9 +1947,6 @@ class S3ObjectList(object):
         self.s3_object_filter = None
         self.folder_to_check = ""
 
-        # S3 Client instance to use
-        self.s3_instance = Client(aws_details=self.aws_details).return_client(service_name="s3")
-
         # Object dictionary
         self.object_dict = None
 
@@ -318,7 +1959,7 @@ class S3ObjectList(object):
         :return: Boolean condition based on whether item passed the filter or not
         """
         # Default filter of checking whether the size is greater than 0B or not
-        if item["Size"] > 0:
+        if item["Size"] > 0 or self.include_empty_objects:
             if self.s3_object_filter:
                 for key in self.s3_object_filter.keys():
                     if item[key] != self.s3_object_filter[key]:
@@ -330,43 +1971,23 @@ class S3ObjectList(object):
         else:
             return False
 
-    def __add_details_to_object_dict(self, list_objects_response: dict, last_modified=None):
-        """
-        This method recursively add data into object Dictionary
-        :param list_objects_response: list_objects_response from boto3 s3 client
-        """
-
-        if list_objects_response["ResponseMetadata"]["HTTPStatusCode"] == 200 and \
-                "Contents" in list_objects_response.keys():
-
-            for item in list_objects_response["Contents"]:
-                if self.__object_filter(item):
-                    match = True
-                    if last_modified and item["LastModified"] < last_modified:
-                        match = False
-                    if match:
-                        object_name = item["Key"]
-                        logging.debug(f"Object available in s3 in folder {self.folder_to_check} : {object_name}")
-                        self.object_dict.update({object_name: item})
-
-            # This check if the response received was truncated or not
-            # If truncated then recursively call and update dictionary
-            if list_objects_response["IsTruncated"]:
-                self.__add_details_to_object_dict(
-                    self.s3_instance.list_objects_v2(
-                        Bucket=self.s3_details["bucket_name"],
-                        Prefix=self.folder_to_check,
-                        ContinuationToken=list_objects_response["NextContinuationToken"]), last_modified)
-        else:
-            logging.error(
-                f"Response from list_objects_v2 : {list_objects_response['ResponseMetadata']}")
-
-    def check_contents_of_s3(self, **kwargs) -> dict:
+    def __is_matching(self, item: dict, last_modified=None) -> bool:
         """
-        Driving method which will get contents of all the objects in s3
-        :return: Returns object dict containing details about s3
+        This method checks item against the object filter and last_modified
+        :param item: s3 item which needs to be checked
+        :param last_modified: Objects modified before this datetime are skipped
+        :return: Boolean condition based on whether item passed the checks or not
         """
+        if not self.__object_filter(item):
+            return False
+        return not (last_modified and item["LastModified"] < last_modified)
 
+    def __update_listing_details(self, kwargs: dict):
+        """
+        This method stores listing details received by the driving methods
+        :param kwargs: keyword arguments of the driving method
+        :return: last_modified datetime if provided
+        """
         if "folder_to_check" in kwargs:
             self.folder_to_check = kwargs["folder_to_check"]
         if "s3_object_filter" in kwargs:
@@ -374,16 +1995,128 @@ class S3ObjectList(object):
 
         self.s3_details = kwargs["s3_details"]
 
-        last_modified = kwargs["last_modified"] if "last_modified" in kwargs else None
+        return kwargs["last_modified"] if "last_modified" in kwargs else None
+
+    def iterate_contents_of_s3(self, **kwargs):
+        """
+        Generator which yields objects of s3 matching the filter, page by page
+        Only one page (at most 1000 objects) is held in memory at a time
+        Exceptions are raised to the caller so that a partial listing is never mistaken for a full one
+        """
+        last_modified = self.__update_listing_details(kwargs)
 
+        paginator = self.s3_instance.get_paginator("list_objects_v2")
+        for list_objects_response in paginator.paginate(Bucket=self.s3_details["bucket_name"],
+                                                        Prefix=self.folder_to_check):
+            for item in list_objects_response.get("Contents", []):
+                if self.__is_matching(item, last_modified):
+                    logging.debug(f"Object available in s3 in folder {self.folder_to_check} : {item['Key']}")
+                    yield item
+
+    def __list_shard(self, list_arguments: dict, last_key=None, last_modified=None) -> list:
+        """
+        This method lists one shard completely
+        :param list_arguments: Arguments for list_objects_v2 (Bucket, Prefix and optionally StartAfter)
+        :param last_key: Listing stops after this key (inclusive), None to list till the end of prefix
+        :param last_modified: Objects modified before this datetime are skipped
+        :return: List of objects in the shard matching the filter
+        """
+        items = list()
+        paginator = self.s3_instance.get_paginator("list_objects_v2")
+        for list_objects_response in paginator.paginate(**list_arguments):
+            for item in list_objects_response.get("Contents", []):
+                if last_key is not None and item["Key"] > last_key:
+                    return items
+                if self.__is_matching(item, last_modified):
+                    items.append(item)
+        return items
+
+    def __discover_shards(self, delimiter: str, shard_alphabet=None):
+        """
+        This method splits the prefix into shards which can be listed independently
+        With shard_alphabet, shard boundaries are folder_to_check + each character of the alphabet, so keys
+        outside the alphabet are still covered by the neighbouring shard.
+        Without it, sub-prefixes are discovered with the delimiter and objects directly under the prefix
+        are returned as they are.
+        :param delimiter: Delimiter to discover sub-prefixes
+        :param shard_alphabet: Characters expected right after folder_to_check, ex: "0123456789abcdef"
+        :return: Tuple of (list of (list_arguments, last_key) shards, list of objects directly under prefix)
+        """
+        bucket_name = self.s3_details["bucket_name"]
+
+        if shard_alphabet:
+            boundaries = sorted({self.folder_to_check + character for character in shard_alphabet})
+            # Shards cover (previous boundary, boundary], first shard starts at the prefix, last one runs till end
+            shards = [({"Bucket": bucket_name, "Prefix": self.folder_to_check}, boundaries[0])]
+            for boundary, next_boundary in zip(boundaries, boundaries[1:] + [None]):
+                shards.append(({"Bucket": bucket_name, "Prefix": self.folder_to_check, "StartAfter": boundary},
+                               next_boundary))
+            return shards, list()
+
+        shards = list()
+        top_level_items = list()
+        paginator = self.s3_instance.get_paginator("list_objects_v2")
+        for list_objects_response in paginator.paginate(Bucket=bucket_name, Prefix=self.folder_to_check,
+                                                        Delimiter=delimiter):
+            for common_prefix in list_objects_response.get("CommonPrefixes", []):
+                shards.append(({"Bucket": bucket_name, "Prefix": common_prefix["Prefix"]}, None))
+            top_level_items.extend(list_objects_response.get("Contents", []))
+        return shards, top_level_items
+
+    def iterate_contents_of_s3_in_parallel(self, **kwargs):
+        """
+        Generator which yields objects of s3 matching the filter, shards of the prefix are listed in parallel
+        Objects are yielded shard by shard in order of completion, not in key order
+        Exceptions are raised to the caller so that a partial listing is never mistaken for a full one
+        """
+        last_modified = self.__update_listing_details(kwargs)
+
+        shards, top_level_items = self.__discover_shards(kwargs.get("delimiter") or "/",
+                                                         kwargs.get("shard_alphabet"))
+        logging.debug(f"Shards discovered in folder {self.folder_to_check} : {len(shards)}")
+
+        for item in top_level_items:
+            if self.__is_matching(item, last_modified):
+                yield item
+
+        with ThreadPoolExecutor(max_workers=kwargs.get("max_workers") or self.max_workers) as executor:
+            futures = [executor.submit(self.__list_shard, list_arguments, last_key, last_modified)
+                       for list_arguments, last_key in shards]
+            try:
+                for future in as_completed(futures):
+                    yield from future.result()
+            finally:
+                executor.shutdown(cancel_futures=True)
+
+    def check_contents_of_s3_in_parallel(self, **kwargs) -> dict:
+        """
+        Driving method which will get contents of all the objects in s3 listing shards in parallel
+        :return: Returns object dict containing details about s3
+        """
+        try:
+            self.object_dict = dict()
+
+            for item in self.iterate_contents_of_s3_in_parallel(**kwargs):
+                self.object_dict.update({item["Key"]: item})
+
+            logging.debug(f"Objects matching filter criteria : {self.object_dict}")
+
+            logging.info(f"Total No of Objects in S3 in folder {self.folder_to_check} : {len(self.object_dict)}")
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3.py : {traceback.format_exc()}")
+        return self.object_dict
+
+    def check_contents_of_s3(self, **kwargs) -> dict:
+        """
+        Driving method which will get contents of all the objects in s3
+        :return: Returns object dict containing details about s3
+        """
         try:
             self.object_dict = dict()
 
-            # Required parameter to call list_objects_v2
-            self.__add_details_to_object_dict(
-                self.s3_instance.list_objects_v2(Bucket=self.s3_details["bucket_name"],
-                                                 Prefix=self.folder_to_check),
-                last_modified)
+            for item in self.iterate_contents_of_s3(**kwargs):
+                self.object_dict.update({item["Key"]: item})
 
             logging.debug(f"Objects matching filter criteria : {self.object_dict}")
 
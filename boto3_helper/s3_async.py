@@ -0,0 +1,202 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+This scripts provides asyncio interface over boto3_helper.s3
+Blocking boto3 calls run on one shared, sized thread pool, concurrency of each helper is bounded by a semaphore
+"""
+import asyncio
+import functools
+import itertools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from amagi_library.boto3_helper.s3 import CopyObjectFromS3ToLocal, CopyObjectFromS3ToS3, CopyToS3, \
+        DisplayS3Object, S3DeleteObject, S3ObjectList
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from boto3_helper.s3 import CopyObjectFromS3ToLocal, CopyObjectFromS3ToS3, CopyToS3, DisplayS3Object, \
+        S3DeleteObject, S3ObjectList
+
+
+class AsyncS3Executor(object):
+    """
+    This class holds the thread pool shared by all async S3 helpers of the process
+    boto3 clients are thread safe, so one pool serves every helper and bucket
+    """
+    # Threads in the shared pool, set before first use
+    max_workers = 64
+
+    __executor = None
+    __lock = threading.Lock()
+
+    @classmethod
+    def executor(cls) -> ThreadPoolExecutor:
+        """
+        This method returns the shared thread pool, creating it on first use
+        """
+        with cls.__lock:
+            if cls.__executor is None:
+                cls.__executor = ThreadPoolExecutor(max_workers=cls.max_workers,
+                                                    thread_name_prefix="async_s3")
+            return cls.__executor
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        """
+        This method shuts the shared thread pool down, next use creates a new one
+        :param wait: Wait for running calls to finish
+        """
+        with cls.__lock:
+            if cls.__executor is not None:
+                cls.__executor.shutdown(wait=wait, cancel_futures=True)
+                cls.__executor = None
+
+
+class AsyncS3Helper(object):
+    """
+    Base class of async helpers, wraps an instance of "helper_class" from boto3_helper.s3
+    Keyword arguments other than "max_concurrency" and "semaphore" are passed to the wrapped helper
+    """
+    helper_class = None
+
+    def __init__(self, **kwargs):
+        # Calls of this helper running at once, "semaphore" can be shared to bound several helpers together
+        self.max_concurrency = kwargs.pop("max_concurrency", AsyncS3Executor.max_workers)
+        self.semaphore = kwargs.pop("semaphore", None) or asyncio.Semaphore(self.max_concurrency)
+
+        self.instance = self.helper_class(**kwargs)
+
+        logging.debug(f"Instance variables for {type(self).__name__} : {self.__dict__}")
+
+    async def _run(self, function, *args, **kwargs):
+        """
+        This method runs a blocking function on the shared thread pool
+        """
+        async with self.semaphore:
+            return await asyncio.get_running_loop().run_in_executor(
+                AsyncS3Executor.executor(), functools.partial(function, *args, **kwargs))
+
+    async def _run_cancellable(self, function, **kwargs):
+        """
+        This method runs a blocking transfer which accepts "cancel_event" on the shared thread pool
+        On cancellation the event is set and the transfer is waited for, so that its multipart upload is
+        aborted before CancelledError is raised
+        """
+        cancel_event = threading.Event()
+        async with self.semaphore:
+            future = asyncio.get_running_loop().run_in_executor(
+                AsyncS3Executor.executor(), functools.partial(function, cancel_event=cancel_event, **kwargs))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                cancel_event.set()
+                logging.info(f"{type(self).__name__} cancelled, waiting for transfer to stop")
+                await asyncio.wait([future])
+                raise
+
+    async def _iterate(self, iterator, batch_size: int):
+        """
+        Async generator over a blocking iterator, items are fetched in batches to keep thread hops few
+        """
+        while True:
+            batch = await self._run(lambda: list(itertools.islice(iterator, batch_size)))
+            if not batch:
+                return
+            for item in batch:
+                yield item
+
+
+class AsyncDisplayS3Object(AsyncS3Helper):
+    """
+    Async interface of DisplayS3Object
+    """
+    helper_class = DisplayS3Object
+
+    async def object_content(self, **kwargs) -> bytes:
+        return await self._run(self.instance.object_content, **kwargs)
+
+    async def object_range(self, **kwargs) -> bytes:
+        return await self._run(self.instance.object_range, **kwargs)
+
+    async def iterate_object_content(self, **kwargs):
+        """
+        Async generator which yields the object in chunks
+        """
+        iterator = self.instance.iterate_object_content(**kwargs)
+        async for chunk in self._iterate(iterator, 1):
+            yield chunk
+
+
+class AsyncCopyToS3(AsyncS3Helper):
+    """
+    Async interface of CopyToS3, cancelling the call aborts the multipart upload
+    """
+    helper_class = CopyToS3
+
+    async def copy_to_destination_s3(self, **kwargs):
+        return await self._run_cancellable(self.instance.copy_to_destination_s3, **kwargs)
+
+
+class AsyncCopyObjectFromS3ToS3(AsyncS3Helper):
+    """
+    Async interface of CopyObjectFromS3ToS3, cancelling the call aborts a multipart copy or upload
+    """
+    helper_class = CopyObjectFromS3ToS3
+
+    async def copy_from_source_to_destination_s3(self, **kwargs):
+        return await self._run_cancellable(self.instance.copy_from_source_to_destination_s3, **kwargs)
+
+
+class AsyncCopyObjectFromS3ToLocal(AsyncS3Helper):
+    """
+    Async interface of CopyObjectFromS3ToLocal, cancelling the call stops the download and removes partial file
+    """
+    helper_class = CopyObjectFromS3ToLocal
+
+    async def download_content(self, **kwargs):
+        return await self._run_cancellable(self.instance.download_content, **kwargs)
+
+
+class AsyncS3DeleteObject(AsyncS3Helper):
+    """
+    Async interface of S3DeleteObject
+    """
+    helper_class = S3DeleteObject
+
+    async def delete_from_s3(self, **kwargs):
+        return await self._run(self.instance.delete_from_s3, **kwargs)
+
+    async def bulk_delete_from_s3(self, **kwargs) -> dict:
+        return await self._run(self.instance.bulk_delete_from_s3, **kwargs)
+
+
+class AsyncS3ObjectList(AsyncS3Helper):
+    """
+    Async interface of S3ObjectList
+    """
+    helper_class = S3ObjectList
+    # Listing entries fetched per thread hop, one list_objects_v2 page
+    batch_size = 1000
+
+    async def iterate_contents_of_s3(self, **kwargs):
+        """
+        Async generator which yields list_objects_v2 entries
+        """
+        iterator = self.instance.iterate_contents_of_s3(**kwargs)
+        async for item in self._iterate(iterator, AsyncS3ObjectList.batch_size):
+            yield item
+
+    async def check_contents_of_s3(self, **kwargs) -> dict:
+        return await self._run(self.instance.check_contents_of_s3, **kwargs)
+
+    async def check_contents_of_s3_in_parallel(self, **kwargs) -> dict:
+        return await self._run(self.instance.check_contents_of_s3_in_parallel, **kwargs)
+
+
+if __name__ == "__main__":
+    # LOGGING #
+    logging_format = "%(asctime)s::%(funcName)s::%(levelname)s:: %(message)s"
+    logging.basicConfig(format=logging_format, level=logging.DEBUG, datefmt="%Y/%m/%d %H:%M:%S:%Z(%z)")
+    logger = logging.getLogger(__name__)
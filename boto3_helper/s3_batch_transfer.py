@@ -0,0 +1,295 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+This scripts copies objects listed in a CSV or JSON Lines manifest between S3 locations
+"""
+import csv
+import json
+import logging
+import os
+import random
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as EndpointConnectionError
+
+try:
+    from amagi_library.boto3_helper.s3 import CopyObjectFromS3ToS3
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from boto3_helper.s3 import CopyObjectFromS3ToS3
+
+
+class TransferProgress(object):
+    """
+    This class keeps counters of a batch transfer, safe to update from many threads
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.counters = {"copied": 0, "failed": 0, "skipped": 0, "bytes": 0, "retries": 0}
+
+    def add(self, counter: str, value=1):
+        with self.lock:
+            self.counters[counter] += value
+
+    def statistics(self) -> dict:
+        """
+        This method returns counters with objects/s and bytes/s since start
+        """
+        with self.lock:
+            statistics = dict(self.counters)
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        statistics["elapsed_seconds"] = round(elapsed, 3)
+        statistics["objects_per_second"] = round(statistics["copied"] / elapsed, 3)
+        statistics["bytes_per_second"] = round(statistics["bytes"] / elapsed, 3)
+        return statistics
+
+
+class S3BatchTransfer(object):
+    """
+    This class copies objects listed in a manifest on a worker pool, with per item retries and a per source
+    bucket concurrency cap. Items of a source bucket at its cap are held back by the dispatcher, so workers are
+    always free for items of other source buckets. Destination buckets are not capped, manifests usually copy
+    into one. Every finished item is appended to a JSON Lines result log, a re-run with the same result log skips
+    items which were copied before.
+
+    Manifest is read as a stream, CSV with a header row or JSON Lines (.json / .jsonl), with fields:
+    source_key (required), source_bucket, destination_bucket, destination_key and size (all optional,
+    buckets default to "source_s3_details" / "destination_s3_details", destination_key to source_key)
+    """
+
+    # S3 error codes which are retried, along with any 5xx / 429 status and connection errors
+    retryable_error_codes = ("SlowDown", "Throttling", "ThrottlingException", "RequestLimitExceeded",
+                             "TooManyRequestsException", "RequestTimeout", "InternalError", "ServiceUnavailable")
+
+    def __init__(self, **kwargs):
+        # Required variable to drive this Class, expected to be provided from parent Object
+        self.source_aws_details = None
+        self.destination_aws_details = None
+
+        # DEFAULT PARALLEL COPIES, PARALLEL COPIES PER SOURCE BUCKET AND ATTEMPTS PER ITEM
+        self.max_workers = 32
+        self.max_workers_per_bucket = 8
+        self.max_attempts = 5
+        # Backoff before attempt n is random between 0 and min(backoff_max, backoff_base * 2 ** n) seconds
+        self.backoff_base = 0.5
+        self.backoff_max = 30
+        # Seconds between progress logs
+        self.progress_interval = 10
+
+        self.__dict__.update(kwargs)
+
+        self.copy_instance = CopyObjectFromS3ToS3(source_aws_details=self.source_aws_details,
+                                                  destination_aws_details=self.destination_aws_details)
+
+        self.result_log_lock = threading.Lock()
+
+        logging.debug(f"Instance variables for S3BatchTransfer : {self.__dict__}")
+
+    @staticmethod
+    def iterate_manifest(manifest_path: str):
+        """
+        Generator which yields manifest rows as dicts without reading the whole manifest
+        :param manifest_path: Local path of CSV or JSON Lines manifest
+        """
+        with open(manifest_path, "r", newline="") as manifest_file:
+            if os.path.splitext(manifest_path)[1].lower() in (".json", ".jsonl"):
+                for line in manifest_file:
+                    if line.strip():
+                        yield json.loads(line)
+            else:
+                yield from csv.DictReader(manifest_file)
+
+    @staticmethod
+    def item_id(item: dict) -> str:
+        """
+        This method returns the identity of an item in the result log
+        """
+        return f"s3://{item['source_bucket']}/{item['source_key']} -> " \
+               f"s3://{item['destination_bucket']}/{item['destination_key']}"
+
+    @staticmethod
+    def completed_items(result_log_path: str) -> set:
+        """
+        This method reads ids of items copied by earlier runs from the result log
+        :param result_log_path: JSON Lines result log, may not exist
+        :return: Set of item ids
+        """
+        completed = set()
+        if not result_log_path or not os.path.exists(result_log_path):
+            return completed
+        with open(result_log_path, "r") as result_log:
+            for line in result_log:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # Last line of a killed run can be half written
+                    continue
+                if result.get("status") == "copied":
+                    completed.add(result["item"])
+        return completed
+
+    @staticmethod
+    def is_retryable(error: BaseException) -> bool:
+        """
+        This method tells whether a failed copy is worth retrying: throttling, 5xx and connection errors
+        """
+        if isinstance(error, ClientError):
+            status_code = error.response.get("ResponseMetadata", {}).get("HTTPStatusCode") or 0
+            return error.response.get("Error", {}).get("Code") in S3BatchTransfer.retryable_error_codes or \
+                status_code >= 500 or status_code == 429
+        return isinstance(error, (EndpointConnectionError, HTTPClientError, ConnectionError, TimeoutError))
+
+    @staticmethod
+    def error_details(error: BaseException) -> dict:
+        """
+        This method returns error code and message of a failed copy for the result log
+        """
+        if isinstance(error, ClientError):
+            return {"error_code": error.response.get("Error", {}).get("Code"),
+                    "error": error.response.get("Error", {}).get("Message") or str(error)}
+        return {"error_code": type(error).__name__, "error": str(error)}
+
+    def __normalize(self, row: dict, kwargs: dict) -> dict:
+        """
+        This method fills defaults of a manifest row
+        """
+        source_key = row["source_key"]
+        size = row.get("size")
+        return {"source_bucket": row.get("source_bucket") or kwargs["source_s3_details"]["bucket_name"],
+                "source_key": source_key,
+                "destination_bucket": row.get("destination_bucket") or
+                kwargs["destination_s3_details"]["bucket_name"],
+                "destination_key": row.get("destination_key") or source_key,
+                "size": int(size) if size not in (None, "") else None}
+
+    def __transfer(self, item: dict, progress: TransferProgress) -> dict:
+        """
+        This method copies one item, retrying throttling, 5xx and connection errors with exponential backoff
+        and jitter, other errors fail the item at once
+        :return: Result entry for the result log, with "error_code" and "error" of the last attempt on failure
+        """
+        result = {"item": S3BatchTransfer.item_id(item), "status": "failed", "attempts": 0}
+
+        for attempt in range(1, self.max_attempts + 1):
+            result["attempts"] = attempt
+            try:
+                if item["size"] is None:
+                    item["size"] = self.copy_instance.source_s3_instance.head_object(
+                        Bucket=item["source_bucket"], Key=item["source_key"])["ContentLength"]
+                copy_arguments = {"source_s3_details": {"bucket_name": item["source_bucket"]},
+                                  "object_original_path": item["source_key"],
+                                  "destination_s3_details": {"bucket_name": item["destination_bucket"]},
+                                  "object_destination_path": item["destination_key"]}
+                # Copy methods which raise are used, so that the error decides whether the item is retried
+                if self.copy_instance.is_server_side_copy_possible():
+                    self.copy_instance.server_side_copy_from_source_to_destination_s3(**copy_arguments)
+                else:
+                    self.copy_instance.streamed_copy_from_source_to_destination_s3(**copy_arguments)
+                result.update(status="copied", size=item["size"])
+                result.pop("error_code", None)
+                result.pop("error", None)
+                progress.add("copied")
+                progress.add("bytes", item["size"])
+                return result
+            except BaseException as error:
+                result.update(S3BatchTransfer.error_details(error))
+                if not S3BatchTransfer.is_retryable(error):
+                    break
+
+            if attempt < self.max_attempts:
+                progress.add("retries")
+                time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+
+        logging.error(f"Giving up on {result['item']} after {result['attempts']} attempts : "
+                      f"{result['error_code']} : {result['error']}")
+        progress.add("failed")
+        return result
+
+    def __report_progress(self, progress: TransferProgress, finished: threading.Event):
+        """
+        This method logs progress every progress_interval seconds until finished is set
+        """
+        while not finished.wait(self.progress_interval):
+            logging.info(f"Batch transfer progress : {progress.statistics()}")
+
+    def transfer(self, **kwargs) -> dict:
+        """
+        Driving method which copies every item of "manifest_path"
+        :param kwargs: "manifest_path", "result_log_path" (JSON Lines, appended to), optional default
+                       "source_s3_details" / "destination_s3_details" and "max_workers"
+        :return: Statistics with counters of copied, failed and skipped items, bytes, objects/s and bytes/s
+        """
+        progress = TransferProgress()
+        finished = threading.Event()
+        reporter = threading.Thread(target=self.__report_progress, args=(progress, finished), daemon=True)
+        max_workers = kwargs.get("max_workers") or self.max_workers
+        result_log_path = kwargs["result_log_path"]
+
+        try:
+            completed = S3BatchTransfer.completed_items(result_log_path)
+            logging.info(f"{len(completed)} items already copied according to {result_log_path}")
+            reporter.start()
+
+            with open(result_log_path, "a") as result_log, \
+                    ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # Only this dispatcher thread touches these, so they need no lock
+                pending = dict()
+                held_back = deque()
+                bucket_counts = dict()
+
+                def submit(item):
+                    bucket_name = item["source_bucket"]
+                    bucket_counts[bucket_name] = bucket_counts.get(bucket_name, 0) + 1
+                    pending[executor.submit(self.__transfer, item, progress)] = item
+
+                def dispatch(item):
+                    # Items of a source bucket at max_workers_per_bucket wait here instead of holding a worker
+                    if bucket_counts.get(item["source_bucket"], 0) < self.max_workers_per_bucket:
+                        submit(item)
+                    else:
+                        held_back.append(item)
+
+                def collect():
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        bucket_counts[pending.pop(future)["source_bucket"]] -= 1
+                        with self.result_log_lock:
+                            result_log.write(json.dumps(future.result()) + "\n")
+                            result_log.flush()
+                    for _ in range(len(held_back)):
+                        dispatch(held_back.popleft())
+
+                for row in S3BatchTransfer.iterate_manifest(kwargs["manifest_path"]):
+                    item = self.__normalize(row, kwargs)
+                    if S3BatchTransfer.item_id(item) in completed:
+                        progress.add("skipped")
+                        continue
+                    # Manifest is consumed only as fast as items finish
+                    while len(pending) + len(held_back) >= 2 * max_workers:
+                        collect()
+                    dispatch(item)
+                while pending:
+                    collect()
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3_batch_transfer.py : {traceback.format_exc()}")
+        finally:
+            finished.set()
+
+        statistics = progress.statistics()
+        logging.info(f"Batch transfer finished : {statistics}")
+        return statistics
+
+
+if __name__ == "__main__":
+    # LOGGING #
+    logging_format = "%(asctime)s::%(funcName)s::%(levelname)s:: %(message)s"
+    logging.basicConfig(format=logging_format, level=logging.DEBUG, datefmt="%Y/%m/%d %H:%M:%S:%Z(%z)")
+    logger = logging.getLogger(__name__)
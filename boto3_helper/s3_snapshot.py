@@ -0,0 +1,323 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+This scripts keeps a persistent local snapshot of S3 listings in SQLite
+Xref : https://docs.aws.amazon.com/AmazonS3/latest/userguide/storage-inventory.html
+"""
+import csv
+import datetime
+import gzip
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import traceback
+from urllib.parse import unquote
+
+try:
+    from amagi_library.boto3_helper.s3 import DisplayS3Object, S3ObjectList
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from boto3_helper.s3 import DisplayS3Object, S3ObjectList
+
+# Highest code point, appended to a prefix it gives the upper bound of all keys under that prefix
+PREFIX_UPPER_BOUND = "\U0010ffff"
+
+
+class S3ListingSnapshot(object):
+    """
+    This class stores listings of S3 prefixes in a local SQLite database and answers queries locally
+    Snapshot is refreshed by re-listing chosen (hot) prefixes or by loading an S3 Inventory CSV report
+    One instance can be shared by threads, its connection is used by one of them at a time (a refresh holds it
+    only while merging its staged listing)
+    """
+    # Rows written in one executemany call
+    batch_size = 1000
+
+    def __init__(self, **kwargs):
+        # Required variable to drive this Class, expected to be provided from parent Object
+        self.aws_details = None
+
+        # SQLite file, "database_path" or a file under "work_directory" (helper.workdir.WorkDirectory)
+        self.database_path = None
+        self.work_directory = None
+
+        self.__dict__.update(kwargs)
+
+        if not self.database_path:
+            self.database_path = os.path.join(self.work_directory.get_work_dir(), "s3_listing_snapshot.sqlite")
+
+        # Connection is used from pool threads, access is serialised by the lock instead of by sqlite3
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(self.database_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.__create_tables()
+        # Last generation handed out, refreshes in flight have one which is not in refreshes table yet
+        self.generation = 0
+
+        self.list_instance = S3ObjectList(aws_details=self.aws_details, include_empty_objects=True)
+        self.display_instance = DisplayS3Object(aws_details=self.aws_details)
+
+        logging.debug(f"Instance variables for S3ListingSnapshot : {self.__dict__}")
+
+    def __create_tables(self):
+        """
+        This method creates tables and indexes if they do not exist
+        """
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS objects ("
+                                    "bucket TEXT NOT NULL, key TEXT NOT NULL, size INTEGER NOT NULL, "
+                                    "etag TEXT, last_modified REAL NOT NULL, storage_class TEXT, "
+                                    "generation INTEGER NOT NULL, PRIMARY KEY (bucket, key)) WITHOUT ROWID")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS objects_last_modified "
+                                    "ON objects (bucket, last_modified)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS objects_size ON objects (bucket, size)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS refreshes ("
+                                    "bucket TEXT NOT NULL, prefix TEXT NOT NULL, source TEXT NOT NULL, "
+                                    "refreshed_at REAL NOT NULL, generation INTEGER NOT NULL, "
+                                    "PRIMARY KEY (bucket, prefix))")
+            # Listing of a refresh is staged here (one generation per refresh) and merged in one transaction
+            self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS staged_objects ("
+                                    "generation INTEGER NOT NULL, key TEXT NOT NULL, size INTEGER NOT NULL, "
+                                    "etag TEXT, last_modified REAL NOT NULL, storage_class TEXT, "
+                                    "PRIMARY KEY (generation, key)) WITHOUT ROWID")
+
+    def close(self):
+        """
+        This method closes the SQLite connection
+        """
+        with self.lock:
+            self.connection.close()
+
+    @staticmethod
+    def __to_item(row) -> dict:
+        """
+        This method converts a row into the shape of a list_objects_v2 entry
+        """
+        return {"Key": row["key"], "Size": row["size"], "ETag": row["etag"],
+                "LastModified": datetime.datetime.fromtimestamp(row["last_modified"], datetime.timezone.utc),
+                "StorageClass": row["storage_class"]}
+
+    def __next_generation(self) -> int:
+        """
+        This method returns a new refresh generation, rows not touched by a refresh keep an older one
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT MAX(generation) FROM refreshes").fetchone()
+            self.generation = max(self.generation, row[0] or 0) + 1
+            return self.generation
+
+    def __stage(self, generation: int, items):
+        """
+        This method stages items of one refresh, the listing is consumed without holding the lock
+        """
+        statement = "INSERT OR REPLACE INTO staged_objects " \
+                    "(generation, key, size, etag, last_modified, storage_class) VALUES (?, ?, ?, ?, ?, ?)"
+        batch = list()
+        for item in items:
+            batch.append((generation, item["Key"], item["Size"], item.get("ETag"),
+                          item["LastModified"].timestamp(), item.get("StorageClass")))
+            if len(batch) >= S3ListingSnapshot.batch_size:
+                with self.lock, self.connection:
+                    self.connection.executemany(statement, batch)
+                batch.clear()
+        with self.lock, self.connection:
+            self.connection.executemany(statement, batch)
+
+    def __store(self, bucket_name: str, prefix: str, source: str, items, listed_at=None):
+        """
+        This method upserts items of one refresh and removes keys under the prefix which were not seen
+        Items are staged first, queries are blocked only while the staged listing is merged
+        :param bucket_name: Bucket name
+        :param prefix: Prefix covered by this refresh, "" for whole bucket
+        :param source: "listing" or "inventory"
+        :param items: Iterable of list_objects_v2 like entries
+        :param listed_at: Timestamp the items were listed at, default now. When given (inventory report), prefixes
+                          refreshed after it and objects modified after it are kept as they are
+        :return: Number of objects stored
+        """
+        generation = self.__next_generation()
+        upper_bound = prefix + PREFIX_UPPER_BOUND
+        try:
+            self.__stage(generation, items)
+            with self.lock, self.connection:
+                if listed_at is None:
+                    listed_at = datetime.datetime.now(datetime.timezone.utc).timestamp()
+                    newer = ("", [])
+                else:
+                    newer = (" AND NOT EXISTS (SELECT 1 FROM refreshes AS refresh WHERE refresh.bucket = ? "
+                             "AND refresh.refreshed_at > ? AND {key} >= refresh.prefix "
+                             "AND {key} < refresh.prefix || ?)", [bucket_name, listed_at, PREFIX_UPPER_BOUND])
+
+                stored = self.connection.execute(
+                    "INSERT OR REPLACE INTO objects "
+                    "(bucket, key, size, etag, last_modified, storage_class, generation) "
+                    "SELECT ?, staged.key, staged.size, staged.etag, staged.last_modified, staged.storage_class, "
+                    "staged.generation FROM staged_objects AS staged WHERE staged.generation = ? "
+                    "AND NOT EXISTS (SELECT 1 FROM objects AS stored WHERE stored.bucket = ? "
+                    "AND stored.key = staged.key AND stored.last_modified > staged.last_modified)" +
+                    newer[0].format(key="staged.key"),
+                    [bucket_name, generation, bucket_name] + newer[1]).rowcount
+
+                self.connection.execute(
+                    "DELETE FROM objects WHERE bucket = ? AND key >= ? AND key < ? AND generation != ? "
+                    "AND last_modified <= ? AND key NOT IN (SELECT key FROM staged_objects WHERE generation = ?)" +
+                    newer[0].format(key="objects.key"),
+                    [bucket_name, prefix, upper_bound, generation, listed_at, generation] + newer[1])
+                self.connection.execute("INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?, ?, ?)",
+                                        (bucket_name, prefix, source, listed_at, generation))
+        finally:
+            with self.lock, self.connection:
+                self.connection.execute("DELETE FROM staged_objects WHERE generation = ?", (generation,))
+        return stored
+
+    def refresh(self, **kwargs) -> int:
+        """
+        Driving method which re-lists "prefixes" (default: whole bucket) and merges them into the snapshot
+        Only the given prefixes are listed, the rest of the snapshot is left as it is
+        "parallel_listing" / "shard_alphabet" use the sharded parallel lister of S3ObjectList
+        :return: Number of objects stored
+        """
+        bucket_name = kwargs["s3_details"]["bucket_name"]
+        stored = 0
+        try:
+            for prefix in kwargs.get("prefixes") or [""]:
+                if kwargs.get("parallel_listing") or kwargs.get("shard_alphabet"):
+                    items = self.list_instance.iterate_contents_of_s3_in_parallel(
+                        s3_details=kwargs["s3_details"], folder_to_check=prefix,
+                        shard_alphabet=kwargs.get("shard_alphabet"))
+                else:
+                    items = self.list_instance.iterate_contents_of_s3(s3_details=kwargs["s3_details"],
+                                                                      folder_to_check=prefix)
+                stored += self.__store(bucket_name, prefix, "listing", items)
+                logging.info(f"Snapshot of s3://{bucket_name}/{prefix} refreshed")
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3_snapshot.py : {traceback.format_exc()}")
+        return stored
+
+    def __iterate_inventory_items(self, inventory_s3_details: dict, manifest: dict):
+        """
+        Generator which yields list_objects_v2 like entries from CSV files of an S3 Inventory report
+        :param inventory_s3_details: Bucket details where the inventory report is delivered
+        :param manifest: Parsed manifest.json of the report
+        """
+        columns = [column.strip() for column in manifest["fileSchema"].split(",")]
+        for inventory_file in manifest["files"]:
+            with self.display_instance.open_object(s3_details=inventory_s3_details,
+                                                   object_path=inventory_file["key"]) as reader, \
+                    io.TextIOWrapper(gzip.GzipFile(fileobj=reader), encoding="utf-8") as text_file:
+                for row in csv.reader(text_file):
+                    record = dict(zip(columns, row))
+                    if record.get("IsDeleteMarker") == "true" or record.get("IsLatest") == "false":
+                        continue
+                    etag = record.get("ETag") or None
+                    yield {"Key": unquote(record["Key"]),
+                           "Size": int(record.get("Size") or 0),
+                           # Inventory ETag has no quotes, listing ETag has
+                           "ETag": f'"{etag}"' if etag and not etag.startswith('"') else etag,
+                           "LastModified": datetime.datetime.strptime(record["LastModifiedDate"],
+                                                                      "%Y-%m-%dT%H:%M:%S.%f%z"),
+                           "StorageClass": record.get("StorageClass")}
+
+    def refresh_from_inventory(self, **kwargs) -> int:
+        """
+        Driving method which replaces the snapshot of the source bucket with a CSV S3 Inventory report
+        Report is as old as its creationTimestamp, prefixes refreshed later and objects modified later are kept
+        :param kwargs: "inventory_s3_details" of the bucket holding the report and "manifest_path" of manifest.json
+        :return: Number of objects stored
+        """
+        stored = 0
+        try:
+            manifest = json.loads(self.display_instance.object_content(s3_details=kwargs["inventory_s3_details"],
+                                                                       object_path=kwargs["manifest_path"]))
+            if manifest["fileFormat"] != "CSV":
+                raise ValueError(f"Only CSV inventory reports are supported, got {manifest['fileFormat']}")
+
+            stored = self.__store(manifest["sourceBucket"], "", "inventory",
+                                  self.__iterate_inventory_items(kwargs["inventory_s3_details"], manifest),
+                                  listed_at=int(manifest["creationTimestamp"]) / 1000)
+            logging.info(f"Snapshot of s3://{manifest['sourceBucket']} loaded from inventory : {stored} objects")
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3_snapshot.py : {traceback.format_exc()}")
+        return stored
+
+    def get_object(self, bucket_name: str, object_path: str):
+        """
+        This method returns snapshot entry of one key
+        :return: list_objects_v2 like entry, None if key is not in snapshot
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT * FROM objects WHERE bucket = ? AND key = ?",
+                                          (bucket_name, object_path)).fetchone()
+        return S3ListingSnapshot.__to_item(row) if row else None
+
+    def iterate_objects(self, bucket_name: str, prefix="", min_size=None, max_size=None,
+                        modified_after=None, modified_before=None):
+        """
+        Generator which yields snapshot entries in key order matching all the given conditions
+        :param bucket_name: Bucket name
+        :param prefix: Key prefix
+        :param min_size: Minimum size in bytes (inclusive)
+        :param max_size: Maximum size in bytes (inclusive)
+        :param modified_after: datetime, objects modified at or after it
+        :param modified_before: datetime, objects modified before it
+        """
+        query = "SELECT * FROM objects WHERE bucket = ? AND key >= ? AND key < ?"
+        parameters = [bucket_name, prefix, prefix + PREFIX_UPPER_BOUND]
+        if min_size is not None:
+            query += " AND size >= ?"
+            parameters.append(min_size)
+        if max_size is not None:
+            query += " AND size <= ?"
+            parameters.append(max_size)
+        if modified_after is not None:
+            query += " AND last_modified >= ?"
+            parameters.append(modified_after.timestamp())
+        if modified_before is not None:
+            query += " AND last_modified < ?"
+            parameters.append(modified_before.timestamp())
+
+        # Rows are fetched in batches under the lock, so the connection is not held while the caller iterates
+        with self.lock:
+            cursor = self.connection.execute(query + " ORDER BY key", parameters)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(S3ListingSnapshot.batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield S3ListingSnapshot.__to_item(row)
+
+    def summary(self, bucket_name: str, prefix="") -> dict:
+        """
+        This method returns object count and total size under a prefix
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects "
+                                          "WHERE bucket = ? AND key >= ? AND key < ?",
+                                          (bucket_name, prefix, prefix + PREFIX_UPPER_BOUND)).fetchone()
+        return {"objects": row[0], "size": row[1]}
+
+    def last_refreshed(self, bucket_name: str, prefix="") -> dict:
+        """
+        This method returns when a prefix was last refreshed and from which source
+        :return: Dict with "source" and "refreshed_at" datetime, None if never refreshed
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT source, refreshed_at FROM refreshes WHERE bucket = ? AND prefix = ?",
+                                          (bucket_name, prefix)).fetchone()
+        if not row:
+            return None
+        return {"source": row["source"],
+                "refreshed_at": datetime.datetime.fromtimestamp(row["refreshed_at"], datetime.timezone.utc)}
+
+
+if __name__ == "__main__":
+    # LOGGING #
+    logging_format = "%(asctime)s::%(funcName)s::%(levelname)s:: %(message)s"
+    logging.basicConfig(format=logging_format, level=logging.DEBUG, datefmt="%Y/%m/%d %H:%M:%S:%Z(%z)")
+    logger = logging.getLogger(__name__)
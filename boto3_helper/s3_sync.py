@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+# coding=utf-8
+"""
+This scripts provides incremental sync of a prefix between two S3 locations
+"""
+import logging
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+try:
+    from amagi_library.boto3_helper.s3 import CopyObjectFromS3ToS3, S3DeleteObject, S3MultipartUpload, S3ObjectList
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from boto3_helper.s3 import CopyObjectFromS3ToS3, S3DeleteObject, S3MultipartUpload, S3ObjectList
+
+
+class SyncS3ToS3(object):
+    """
+    This class syncs objects under a source prefix to a destination prefix, copying only what changed
+    """
+
+    def __init__(self, **kwargs):
+        # Required variable to drive this Class, expected to be provided from parent Object
+        self.source_aws_details = None
+        self.destination_aws_details = None
+
+        # DEFAULT PARALLEL COPIES
+        self.max_workers = 16
+
+        # Compare different single part ETags of same size objects, costs 2 head_object per such object since
+        # listings do not tell whether an ETag is md5 (SSE-KMS / SSE-C ETags always differ between copies)
+        self.compare_etags = False
+
+        self.__dict__.update(kwargs)
+
+        # Instances are reused for every sync, so sessions and clients are created once
+        self.source_list_instance = S3ObjectList(aws_details=self.source_aws_details, include_empty_objects=True)
+        self.destination_list_instance = S3ObjectList(aws_details=self.destination_aws_details,
+                                                      include_empty_objects=True)
+        self.copy_instance = CopyObjectFromS3ToS3(source_aws_details=self.source_aws_details,
+                                                  destination_aws_details=self.destination_aws_details)
+        self.delete_instance = S3DeleteObject(aws_details=self.destination_aws_details)
+
+        logging.debug(f"Instance variables for SyncS3ToS3 : {self.__dict__}")
+
+    @staticmethod
+    def change_reason(source_item: dict, destination_item, compare_etags=True):
+        """
+        This method compares a source object with its destination counterpart
+        Equal ETags mean unchanged. Different single part ETags mean changed when both are md5 of the data (plain
+        or SSE-S3 objects). Multipart ETags depend on the part size and SSE-KMS / SSE-C ETags are not md5, so for
+        those size and LastModified decide (like "aws s3 sync").
+        :param source_item: Listing entry of source object, with ServerSideEncryption / SSECustomerAlgorithm of
+                            head_object when ETags are compared, see plan
+        :param destination_item: Listing entry of destination object, None if missing
+        :param compare_etags: False to let size and LastModified decide for every different ETag, ex: when
+                              encryption of the objects is not known
+        :return: Reason for copying, None if the object is unchanged
+        """
+        if destination_item is None:
+            return "missing"
+        if source_item["Size"] != destination_item["Size"]:
+            return "size"
+        if source_item["ETag"] == destination_item["ETag"]:
+            return None
+        if compare_etags and "-" not in source_item["ETag"] and "-" not in destination_item["ETag"] and \
+                S3MultipartUpload.has_md5_etag(source_item) and S3MultipartUpload.has_md5_etag(destination_item):
+            return "etag"
+        if source_item["LastModified"] > destination_item["LastModified"]:
+            return "last_modified"
+        return None
+
+    @staticmethod
+    def __add_encryption(list_instance: S3ObjectList, s3_details: dict, item: dict):
+        """
+        This method adds encryption of an object to its listing entry, listings do not have it
+        """
+        head_response = list_instance.s3_instance.head_object(Bucket=s3_details["bucket_name"], Key=item["Key"])
+        for attribute in ("ServerSideEncryption", "SSECustomerAlgorithm"):
+            if head_response.get(attribute):
+                item[attribute] = head_response[attribute]
+
+    def __iterate_contents(self, list_instance: S3ObjectList, s3_details: dict, prefix: str, kwargs: dict):
+        """
+        Generator which yields every object under the prefix, shards are listed in parallel if asked for
+        """
+        if kwargs.get("parallel_listing") or kwargs.get("shard_alphabet"):
+            return list_instance.iterate_contents_of_s3_in_parallel(s3_details=s3_details, folder_to_check=prefix,
+                                                                    shard_alphabet=kwargs.get("shard_alphabet"))
+        return list_instance.iterate_contents_of_s3(s3_details=s3_details, folder_to_check=prefix)
+
+    def plan(self, **kwargs) -> dict:
+        """
+        This method lists both locations and works out what a sync has to do, nothing is changed
+        Destination listing is held in memory, source listing is streamed against it. Only listings are made,
+        unless "compare_etags" (default: instance one) asks for head_object of same size objects whose single part
+        ETags differ, to tell a changed md5 from an SSE-KMS / SSE-C ETag
+        :return: Plan with "copy" list of dicts (object_original_path, object_destination_path, reason),
+                 "delete" list of extraneous destination keys (only if "delete" is True) and "unchanged" count
+        """
+        source_prefix = kwargs.get("source_prefix", "")
+        destination_prefix = kwargs.get("destination_prefix", "")
+
+        destination_items = {item["Key"]: item for item in self.__iterate_contents(
+            self.destination_list_instance, kwargs["destination_s3_details"], destination_prefix, kwargs)}
+
+        compare_etags = kwargs.get("compare_etags", self.compare_etags)
+
+        sync_plan = {"copy": list(), "delete": list(), "unchanged": 0}
+        for source_item in self.__iterate_contents(self.source_list_instance, kwargs["source_s3_details"],
+                                                   source_prefix, kwargs):
+            object_destination_path = destination_prefix + source_item["Key"][len(source_prefix):]
+            destination_item = destination_items.pop(object_destination_path, None)
+            if compare_etags and destination_item and source_item["Size"] == destination_item["Size"] and \
+                    "-" not in source_item["ETag"] + destination_item["ETag"] and \
+                    source_item["ETag"] != destination_item["ETag"]:
+                # Different single part ETags are compared only if both are md5, which needs head_object
+                SyncS3ToS3.__add_encryption(self.source_list_instance, kwargs["source_s3_details"], source_item)
+                SyncS3ToS3.__add_encryption(self.destination_list_instance, kwargs["destination_s3_details"],
+                                            destination_item)
+            reason = SyncS3ToS3.change_reason(source_item, destination_item, compare_etags)
+            if reason:
+                sync_plan["copy"].append({"object_original_path": source_item["Key"],
+                                          "object_destination_path": object_destination_path,
+                                          "reason": reason})
+            else:
+                sync_plan["unchanged"] += 1
+
+        # Whatever is left in destination has no source counterpart
+        if kwargs.get("delete"):
+            sync_plan["delete"] = sorted(destination_items)
+
+        logging.info(f"Sync plan : {len(sync_plan['copy'])} to copy, {len(sync_plan['delete'])} to delete, "
+                     f"{sync_plan['unchanged']} unchanged")
+        return sync_plan
+
+    def __copy(self, source_s3_details: dict, destination_s3_details: dict, copy_details: dict) -> tuple:
+        """
+        This method copies one object of the plan
+        :return: Tuple of (source key, True if copied)
+        """
+        return copy_details["object_original_path"], bool(self.copy_instance.copy_from_source_to_destination_s3(
+            source_s3_details=source_s3_details, object_original_path=copy_details["object_original_path"],
+            destination_s3_details=destination_s3_details,
+            object_destination_path=copy_details["object_destination_path"]))
+
+    def sync(self, **kwargs) -> dict:
+        """
+        Driving method which syncs source prefix to destination prefix
+        Keyword arguments are the ones of plan, plus "dry_run" to only return the plan and "max_workers"
+        :return: Plan in dry run, otherwise report with "copied", "copy_errors", "deleted", "delete_errors"
+                 and "unchanged"
+        """
+        report = {"copied": list(), "copy_errors": list(), "deleted": list(), "delete_errors": dict(),
+                  "unchanged": 0}
+        try:
+            sync_plan = self.plan(**kwargs)
+            if kwargs.get("dry_run"):
+                return sync_plan
+            report["unchanged"] = sync_plan["unchanged"]
+
+            def collect(futures):
+                for future in futures:
+                    object_original_path, copied = future.result()
+                    report["copied" if copied else "copy_errors"].append(object_original_path)
+
+            max_workers = kwargs.get("max_workers") or self.max_workers
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                for copy_details in sync_plan["copy"]:
+                    if len(pending) >= max_workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    pending.add(executor.submit(self.__copy, kwargs["source_s3_details"],
+                                                kwargs["destination_s3_details"], copy_details))
+                collect(wait(pending).done)
+
+            if sync_plan["delete"]:
+                delete_report = self.delete_instance.bulk_delete_from_s3(s3_details=kwargs["destination_s3_details"],
+                                                                         object_paths=sync_plan["delete"])
+                report["deleted"] = delete_report["deleted"]
+                report["delete_errors"] = delete_report["errors"]
+
+            logging.info(f"Sync done : {len(report['copied'])} copied, {len(report['copy_errors'])} copy errors, "
+                         f"{len(report['deleted'])} deleted, {len(report['delete_errors'])} delete errors")
+
+        except BaseException:
+            logging.error(f"Uncaught exception in s3_sync.py : {traceback.format_exc()}")
+        return report
+
+
+if __name__ == "__main__":
+    # LOGGING #
+    logging_format = "%(asctime)s::%(funcName)s::%(levelname)s:: %(message)s"
+    logging.basicConfig(format=logging_format, level=logging.DEBUG, datefmt="%Y/%m/%d %H:%M:%S:%Z(%z)")
+    logger = logging.getLogger(__name__)
@@ -12,10 +12,10 @@ from email.mime.text import MIMEText
 from botocore.exceptions import ClientError
 
 try:
-    from amagi_library.boto3_helper.client import Client
+    from amagi_library.boto3_helper.client import LazyClient
 except ModuleNotFoundError:
     logging.info("Module called internally")
-    from boto3_helper.client import Client
+    from boto3_helper.client import LazyClient
 
 # The character encoding for the email.
 CHARSET = "utf-8"
@@ -25,6 +25,8 @@ class SesSendEmail(object):
     """
         This Class handles creation of email using SES
     """
+    # SES Client instance to use, created on first use from aws_details
+    email_ses_client_instance = LazyClient("ses")
 
     def __init__(self, **kwargs):
         self.aws_details = None
@@ -35,8 +37,6 @@ class SesSendEmail(object):
         self.msg = None
         self.recipients = None
 
-        self.email_ses_client_instance = Client(aws_details=self.aws_details).return_client(service_name="ses")
-
         logging.debug(f"Instance variables for SesSendEmail : {self.__dict__}")
 
     def prepare_email(self, **kwargs):
@@ -6,34 +6,92 @@ This scripts provides wrapper over AWS Session
 import logging
 import traceback
 
-import boto3
-
 try:
-    from amagi_library.boto3_helper.arn_session import assumed_role_session
+    from amagi_library.helper.lazy_import import arn_session_module, boto3, botocore_config
+    from amagi_library.boto3_helper.session_cache import SessionCache
 except ModuleNotFoundError:
     logging.info("Module called internally")
-    from boto3_helper.arn_session import assumed_role_session
+    from helper.lazy_import import arn_session_module, boto3, botocore_config
+    from boto3_helper.session_cache import SessionCache
+
+# Keys of aws_details which are options, not credentials
+AWS_DETAILS_OPTIONS = {"credential_cache_directory", "transport_config"}
+
+
+def has_credentials(aws_details) -> bool:
+    """
+    This method tells if aws_details carries credentials, otherwise the default credential chain is used
+    """
+    return bool(set(aws_details or ()) - AWS_DETAILS_OPTIONS)
+
+
+def transport_arguments(aws_details=None, transport_config=None) -> dict:
+    """
+    This method builds client arguments from "transport_config" of aws_details and a companion transport_config,
+    keys of the companion take precedence. Settings are botocore Config options, ex: max_pool_connections,
+    connect_timeout, read_timeout, tcp_keepalive, plus retry_mode ("standard" / "adaptive"), max_attempts and
+    endpoint_url
+    :param aws_details: aws_details, may contain "transport_config"
+    :param transport_config: Companion settings, ex: {"max_pool_connections": 64, "retry_mode": "adaptive"}
+    :return: Keyword arguments for session.client / session.resource, empty without settings
+    """
+    settings = dict((aws_details or dict()).get("transport_config") or dict())
+    settings.update(transport_config or dict())
+
+    arguments = dict()
+    if "endpoint_url" in settings:
+        arguments["endpoint_url"] = settings.pop("endpoint_url")
+    retries = dict(settings.pop("retries", None) or dict())
+    if "retry_mode" in settings:
+        retries["mode"] = settings.pop("retry_mode")
+    if "max_attempts" in settings:
+        retries["max_attempts"] = settings.pop("max_attempts")
+    if retries:
+        settings["retries"] = retries
+    if settings:
+        arguments["config"] = botocore_config.Config(**settings)
+    return arguments
 
 
 class Session(object):
     """
         This Class handles creation of AWS Session
+        Transport settings become the default config of clients created from the session, endpoint_url
+        can not be carried by a session and is applied by Client and Resource only
     """
 
     def __init__(self, **kwargs):
         self.aws_details = None
+
+        # Sessions are shared through SessionCache, False creates a private session
+        self.use_cache = True
+
+        # Companion transport settings, see transport_arguments
+        self.transport_config = None
+
         self.__dict__.update(kwargs)
 
         logging.debug(f"Instance variables for Session : {self.__dict__}")
 
     def return_session(self):
+        """
+        This method returns AWS Session for aws_details, created once per process unless use_cache is False
+        A cached session is shared, create clients through Client (boto3 sessions are not thread safe)
+        """
+        if self.use_cache:
+            # Without companion settings this is the same session Client and Resource create clients from
+            session_arguments = {"transport_config": self.transport_config} if self.transport_config else dict()
+            return SessionCache.session(self.aws_details, self.create_session, **session_arguments)
+        return self.create_session()
+
+    def create_session(self):
         """
         This method creates AWS Session
         """
         session = None
 
         try:
-            if self.aws_details:
+            if has_credentials(self.aws_details):
                 # Checking if assigned_role_arn is provided or not
                 if {"assigned_role_arn", "access_key", "secret_key", "region_name"}.issubset(
                         set(self.aws_details.keys())):
@@ -44,8 +102,10 @@ class Session(object):
                         region_name=self.aws_details["region_name"])
 
                     # Created ARN session ( This is a boto3 session )
-                    session = assumed_role_session(role_arn=self.aws_details["assigned_role_arn"],
-                                                   base_session=base_session._session)
+                    session = arn_session_module.assumed_role_session(
+                        role_arn=self.aws_details["assigned_role_arn"], base_session=base_session._session,
+                        cache_directory=self.aws_details.get("credential_cache_directory",
+                                                             arn_session_module.CREDENTIAL_CACHE_DIRECTORY))
 
                 elif {"access_key", "secret_key", "region_name"}.issubset(set(self.aws_details.keys())):
                     # Created normal session in case of no ARN
@@ -60,7 +120,44 @@ class Session(object):
                 # Create normal session if no credentials are provided
                 session = boto3.session.Session()
 
+            client_config = transport_arguments(self.aws_details, self.transport_config).get("config")
+            if session is not None and client_config is not None:
+                session._session.set_default_client_config(client_config)
+
         except BaseException:
             logging.error(f"Uncaught exception in session.py : {traceback.format_exc()}")
             raise BaseException("Problem in session.py")
         return session
+
+
+class LazyAWSAttribute(object):
+    """
+    Descriptor which creates an AWS object on first access, from the aws_details attribute of the instance
+    Object is then stored on the instance, so later accesses (or an object assigned up front) skip the descriptor
+    """
+
+    def __init__(self, aws_details_attribute="aws_details"):
+        self.aws_details_attribute = aws_details_attribute
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def create(self, aws_details):
+        raise NotImplementedError("create")
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self.create(getattr(instance, self.aws_details_attribute))
+        instance.__dict__[self.name] = value
+        return value
+
+
+class LazySession(LazyAWSAttribute):
+    """
+    Descriptor which returns the AWS session of aws_details on first access
+    """
+
+    def create(self, aws_details):
+        return Session(aws_details=aws_details).return_session()
@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+# coding= utf-8
+"""
+This scripts keeps a process wide cache of boto3 sessions, clients and resources
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+
+
+class SessionCache(object):
+    """
+    This Class is a thread safe registry of boto3 sessions, clients and resources keyed by a stable hash of
+    aws_details, so helpers built with the same aws_details share one session (one AssumeRole) and one client
+    per service. Assumed role sessions carry refreshable credentials, cached clients keep working after expiry.
+    Clients are thread safe and shared by all threads, resources are not and are cached per thread (in a
+    threading.local, so a resource goes away with its thread).
+    Registry is emptied in a forked child, connection pools of the parent are never used by the child.
+    """
+    __lock = threading.RLock()
+    __sessions = dict()
+    __clients = dict()
+    __resources = dict()
+    __pid = os.getpid()
+
+    @staticmethod
+    def describe(value):
+        """
+        This method returns a JSON serializable description of values in cache keys
+        botocore Config has no stable repr, the options it was created with identify it
+        """
+        options = getattr(value, "_user_provided_options", None)
+        return options if options is not None else str(value)
+
+    @staticmethod
+    def key(aws_details, *extra) -> str:
+        """
+        This method returns a stable hash of aws_details (and extra values), independent of dict ordering
+        """
+        return hashlib.sha256(json.dumps([aws_details, *extra], sort_keys=True,
+                                         default=SessionCache.describe).encode()).hexdigest()
+
+    @classmethod
+    def reset(cls):
+        """
+        This method empties the registry without touching cached objects, used in a forked child
+        """
+        cls.__lock = threading.RLock()
+        cls.__sessions = dict()
+        cls.__clients = dict()
+        cls.__resources = dict()
+        cls.__pid = os.getpid()
+
+    @classmethod
+    def __check_fork(cls):
+        # Covers forks which bypass os.register_at_fork hooks (ex: os.fork from C extensions)
+        if cls.__pid != os.getpid():
+            logging.debug("Process was forked, emptying session cache")
+            cls.reset()
+
+    @classmethod
+    def session(cls, aws_details, create_session, **session_arguments):
+        """
+        This method returns the cached session for aws_details, creating it with create_session on first use
+        :param aws_details: aws_details the session is built from
+        :param create_session: Callable returning a new boto3 session
+        :param session_arguments: Other settings create_session applies to the session, part of the cache key
+        """
+        cls.__check_fork()
+        key = (cls.key(aws_details), cls.key(session_arguments))
+        with cls.__lock:
+            if key not in cls.__sessions:
+                session = create_session()
+                if session is None:
+                    return None
+                cls.__sessions[key] = session
+            return cls.__sessions[key]
+
+    @classmethod
+    def client(cls, aws_details, service_name: str, create_session, **client_arguments):
+        """
+        This method returns the cached client of a service for aws_details
+        :param aws_details: aws_details the session is built from
+        :param service_name: Service name, ex: "s3"
+        :param create_session: Callable returning a new boto3 session
+        :param client_arguments: Extra arguments for session.client, part of the cache key
+        """
+        cls.__check_fork()
+        key = (cls.key(aws_details), cls.key(client_arguments), service_name)
+        with cls.__lock:
+            if key not in cls.__clients:
+                session = cls.session(aws_details, create_session)
+                if session is None:
+                    return None
+                # boto3 sessions are not thread safe, clients are created under the lock
+                cls.__clients[key] = session.client(service_name, **client_arguments)
+            return cls.__clients[key]
+
+    @classmethod
+    def resource(cls, aws_details, service_name: str, create_session, **resource_arguments):
+        """
+        This method returns the cached resource of a service for aws_details and the calling thread
+        :param aws_details: aws_details the session is built from
+        :param service_name: Service name, ex: "dynamodb"
+        :param create_session: Callable returning a new boto3 session
+        :param resource_arguments: Extra arguments for session.resource, part of the cache key
+        """
+        cls.__check_fork()
+        key = (cls.key(aws_details), cls.key(resource_arguments), service_name)
+        with cls.__lock:
+            if key not in cls.__resources:
+                cls.__resources[key] = threading.local()
+            resources = cls.__resources[key]
+            if not hasattr(resources, "resource"):
+                session = cls.session(aws_details, create_session)
+                if session is None:
+                    return None
+                resources.resource = session.resource(service_name, **resource_arguments)
+            return resources.resource
+
+    @classmethod
+    def evict(cls, aws_details=None):
+        """
+        This method drops cached objects of aws_details, or everything if aws_details is None
+        Objects already handed out keep working, later lookups create new ones
+        """
+        with cls.__lock:
+            if aws_details is None:
+                cls.__sessions.clear()
+                cls.__clients.clear()
+                cls.__resources.clear()
+                return
+            session_key = cls.key(aws_details)
+            for cache in (cls.__sessions, cls.__clients, cls.__resources):
+                for key in [key for key in cache if key[0] == session_key]:
+                    del cache[key]
+
+    @classmethod
+    def statistics(cls) -> dict:
+        """
+        This method returns number of cached sessions, clients and resources (per thread resources of one
+        aws_details, service and arguments count once)
+        """
+        with cls.__lock:
+            return {"sessions": len(cls.__sessions), "clients": len(cls.__clients),
+                    "resources": len(cls.__resources)}
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=SessionCache.reset)
@@ -3,4 +3,15 @@
 """
 Init file for Helper scripts
 """
-__all__ = ["amazon_signing", "config_hash", "deserializer", "hash_calculator", "http_requests", "k8s_secret_config"]
+import logging
+
+try:
+    from amagi_library.helper.lazy_import import lazy_submodules
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import lazy_submodules
+
+__all__ = ["amazon_signing", "config_hash", "deserializer", "hash_calculator", "http_requests", "k8s_secret_config",
+           "http_metrics", "lazy_import"]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
@@ -11,8 +11,12 @@ import logging
 import sys
 from datetime import datetime
 
-import boto3
-from botocore.config import Config
+try:
+    # Imported on first presigned URL, signing of API requests does not need boto3
+    from amagi_library.helper.lazy_import import boto3, botocore_config
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import boto3, botocore_config
 
 
 def sign(key, msg):
@@ -40,8 +44,8 @@ def get_signed_url(expires_in, bucket, obj, access_key=None, secret_key=None, re
     """
     s3_cli = boto3.client("s3", aws_access_key_id=access_key,
                           aws_secret_access_key=secret_key,
-                          region_name=region, config=Config(signature_version="s3v4",
-                                                            s3={"addressing_style": "virtual"}))
+                          region_name=region, config=botocore_config.Config(signature_version="s3v4",
+                                                                            s3={"addressing_style": "virtual"}))
     return s3_cli.generate_presigned_url("get_object", Params={"Bucket": bucket, "Key": obj},
                                          ExpiresIn=expires_in)
 
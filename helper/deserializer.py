@@ -10,9 +10,17 @@ import traceback
 from io import StringIO
 from json import JSONDecodeError
 
-import yaml
 from idna import unicode
 
+try:
+    from amagi_library.helper.lazy_import import LazyModule
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import LazyModule
+
+# Imported on first YAML document
+yaml = LazyModule("yaml")
+
 
 class Deserializer(object):
     """
@@ -3,6 +3,7 @@
 """
 This is a helper script to provide hash of data
 """
+import base64
 import hashlib
 
 
@@ -49,3 +50,43 @@ def calculate_sha512sum(data, byte=False):
     else:
         m.update(str(data).encode())
     return m.hexdigest()
+
+
+class TransferDigest(object):
+    """
+    This class calculates digests of data fed part by part in order, in a single pass over the data
+    Along with the requested digests it keeps md5 of every part, to give S3 compatible ETag and Content-MD5
+    """
+
+    def __init__(self, algorithms=("md5",)):
+        self.hashers = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        self.part_md5_digests = list()
+
+    def update_part(self, data) -> str:
+        """
+        This method feeds one complete part
+        :param data: Data of the part in bytes
+        :return: Base64 md5 of the part, to be sent as Content-MD5
+        """
+        for hasher in self.hashers.values():
+            hasher.update(data)
+        part_md5_digest = hashlib.md5(data).digest()
+        self.part_md5_digests.append(part_md5_digest)
+        return base64.b64encode(part_md5_digest).decode()
+
+    def etag(self) -> str:
+        """
+        This method returns the ETag S3 gives to the object if uploaded with the same parts
+        md5 of the data for single part upload, md5 of the part md5s with part count for multipart upload
+        """
+        if len(self.part_md5_digests) == 1:
+            return f'"{self.part_md5_digests[0].hex()}"'
+        return f'"{hashlib.md5(b"".join(self.part_md5_digests)).hexdigest()}-{len(self.part_md5_digests)}"'
+
+    def hexdigests(self) -> dict:
+        """
+        This method returns hex digest of every requested algorithm along with the ETag
+        """
+        digests = {algorithm: hasher.hexdigest() for algorithm, hasher in self.hashers.items()}
+        digests["etag"] = self.etag()
+        return digests
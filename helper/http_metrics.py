@@ -0,0 +1,134 @@
+#!/usr/bin/python3
+# coding= utf-8
+"""
+This is a helper script to instrument HTTP requests with metrics instead of logging every request and response
+"""
+import bisect
+import logging
+import random
+import re
+import threading
+from urllib.parse import urlsplit
+
+# Values of keys containing any of these words are replaced in logged URLs, params, headers and bodies
+# ex: access_token, auth_secret, Authorization, X-Hybrik-Sapiauth, x-api-key, X-Amz-Signature (presigned S3 URL),
+# X-Amz-Credential, Signature (CloudFront signed URL)
+REDACTED_KEYS = ("auth", "token", "password", "passwd", "secret", "api_key", "api-key", "apikey", "cookie",
+                 "signature", "credential")
+
+# Quoted values are replaced up to their closing quote, others up to a separator
+REDACT_PATTERN = re.compile(r"(?i)([\"']?[\w-]*(?:" + "|".join(re.escape(key) for key in REDACTED_KEYS) +
+                            r")[\w-]*[\"']?\s*[:=]\s*)(?:([\"'])(?:\\.|(?!\2).)*\2|"
+                            r"(?:Bearer\s+|Basic\s+)?[^\"'&\s,;}]+)")
+
+# Path segments which are ids (numbers, hex or uuid like), replaced to keep one metric per endpoint
+ID_SEGMENT_PATTERN = re.compile(r"^(\d+|[0-9a-fA-F-]{8,})$")
+
+
+def redact(text) -> str:
+    """
+    This method replaces values of token, secret, password, signature and authorization like keys with ***
+    :param text: Any value, ex: URL, dict of params or headers, body
+    """
+    return REDACT_PATTERN.sub(r"\1\2***\2", str(text))
+
+
+def endpoint_of(method: str, url: str) -> str:
+    """
+    This method returns the endpoint of a request, query is dropped and id like path segments become {id}
+    ex: GET https://customer.amagi.tv/v1/api/media/1234?token=x -> GET customer.amagi.tv/v1/api/media/{id}
+    """
+    parts = urlsplit(url)
+    path = "/".join("{id}" if ID_SEGMENT_PATTERN.match(segment) else segment for segment in parts.path.split("/"))
+    return f"{method} {parts.netloc}{path}"
+
+
+class HTTPInstrumentation(object):
+    """
+    Base class of instrumentation hooks of HTTPRequests, ex: to export metrics to StatsD or Prometheus
+    Set HTTPRequests.instrumentation to an instance to enable it for the process
+    """
+
+    def record(self, method: str, url: str, status_code, elapsed_seconds: float, request_bytes: int,
+               response_bytes: int, response=None, stream=False):
+        """
+        This method is called once per request, from the thread which made it
+        :param status_code: Status code, None if no response was received
+        :param response_bytes: Size of response body, from Content-Length for streamed responses
+        :param response: requests Response, None if no response was received
+        :param stream: Response body is streamed, it is not read yet and belongs to the caller
+        """
+        raise NotImplementedError("record")
+
+
+class HTTPMetrics(HTTPInstrumentation):
+    """
+    This Class aggregates per endpoint latency histograms, byte counts and status counters in memory
+    Response bodies can be logged for a sample of requests, redacted and truncated
+    """
+
+    def __init__(self, **kwargs):
+        # Upper bounds of latency buckets in seconds, a last bucket catches everything slower
+        self.buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+        # Fraction of responses whose body is logged at DEBUG, and bytes of body logged
+        self.body_sample_rate = 0.0
+        self.body_log_limit = 2048
+
+        # Callable (method, url) -> endpoint name
+        self.endpoint = endpoint_of
+
+        self.__dict__.update(kwargs)
+
+        self.lock = threading.Lock()
+        self.endpoints = dict()
+
+        logging.debug(f"Instance variables for HTTPMetrics : {self.__dict__}")
+
+    def record(self, method: str, url: str, status_code, elapsed_seconds: float, request_bytes: int,
+               response_bytes: int, response=None, stream=False):
+        endpoint = self.endpoint(method, url)
+        with self.lock:
+            metrics = self.endpoints.get(endpoint)
+            if metrics is None:
+                metrics = {"count": 0, "status": dict(), "latency_buckets": [0] * (len(self.buckets) + 1),
+                           "latency_sum": 0.0, "request_bytes": 0, "response_bytes": 0}
+                self.endpoints[endpoint] = metrics
+            metrics["count"] += 1
+            metrics["status"][status_code] = metrics["status"].get(status_code, 0) + 1
+            metrics["latency_buckets"][bisect.bisect_left(self.buckets, elapsed_seconds)] += 1
+            metrics["latency_sum"] += elapsed_seconds
+            metrics["request_bytes"] += request_bytes
+            metrics["response_bytes"] += response_bytes
+
+        # Streamed bodies are left to the caller, reading them here would consume the stream
+        if self.body_sample_rate and response is not None and not stream and \
+                random.random() < self.body_sample_rate:
+            body = response.content[:self.body_log_limit].decode("utf-8", errors="replace")
+            logging.debug(f"Response body of {endpoint} ({status_code}, {response_bytes} bytes) : {redact(body)}")
+
+    def statistics(self) -> dict:
+        """
+        This method returns metrics per endpoint, latency histogram is cumulative by bucket upper bound
+        """
+        statistics = dict()
+        with self.lock:
+            for endpoint, metrics in self.endpoints.items():
+                cumulative = 0
+                histogram = dict()
+                for upper_bound, count in zip(list(self.buckets) + ["+Inf"], metrics["latency_buckets"]):
+                    cumulative += count
+                    histogram[upper_bound] = cumulative
+                statistics[endpoint] = {"count": metrics["count"], "status": dict(metrics["status"]),
+                                        "latency_histogram": histogram,
+                                        "latency_sum": round(metrics["latency_sum"], 6),
+                                        "request_bytes": metrics["request_bytes"],
+                                        "response_bytes": metrics["response_bytes"]}
+        return statistics
+
+    def reset(self):
+        """
+        This method empties all metrics
+        """
+        with self.lock:
+            self.endpoints = dict()
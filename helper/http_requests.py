@@ -4,8 +4,172 @@
 This is a helper script for sending HTTP Requests
 """
 import logging
+import os
+import socket
+import threading
+import time
+import traceback
+import weakref
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+try:
+    from amagi_library.helper.http_metrics import redact
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.http_metrics import redact
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter which can set socket options (ex: TCP keepalive) on the connections of its pools
+    """
+
+    def __init__(self, socket_options=None, **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self.socket_options is not None:
+            kwargs["socket_options"] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class HTTPTransport(object):
+    """
+    This Class keeps process wide HTTP connection pools shared by every HTTPRequests, so connections and TLS
+    sessions are reused across objects and threads. Only the adapters holding the pools are shared, each
+    HTTPRequests keeps its own session (cookies, headers). Pools are dropped in a forked child.
+    Sessions the adapters are mounted on are tracked (weakly), so that they get the new adapters whenever the
+    shared ones are replaced (configure, close, fork).
+    """
+    # DEFAULT HOSTS KEPT PER ADAPTER AND CONNECTIONS KEPT PER HOST, set through configure
+    pool_connections = 32
+    pool_maxsize = 16
+    # Connections kept for specific hosts, ex: {"customer.amagi.tv": 64}
+    host_pool_maxsize = dict()
+    # HTTP persistent connections, and SO_KEEPALIVE for connections idle behind load balancers
+    keep_alive = True
+    tcp_keepalive = False
+
+    __lock = threading.Lock()
+    __adapters = None
+    __sessions = weakref.WeakSet()
+    __pid = os.getpid()
+
+    @classmethod
+    def configure(cls, **kwargs):
+        """
+        This method changes settings, open sessions get adapters with the new settings and older pools are closed
+        Best called at startup, a session sending a request while its adapters are replaced may fail that request
+        :param kwargs: Any of pool_connections, pool_maxsize, host_pool_maxsize, keep_alive, tcp_keepalive
+        """
+        with cls.__lock:
+            for key, value in kwargs.items():
+                if key not in ("pool_connections", "pool_maxsize", "host_pool_maxsize", "keep_alive",
+                               "tcp_keepalive"):
+                    raise ValueError(f"Unknown HTTPTransport setting : {key}")
+                setattr(cls, key, value)
+        cls.__replace_adapters()
+
+    @classmethod
+    def __create_adapter(cls, pool_maxsize: int) -> HTTPAdapter:
+        socket_options = None
+        if cls.tcp_keepalive:
+            socket_options = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        return PooledHTTPAdapter(socket_options=socket_options, pool_connections=cls.pool_connections,
+                                 pool_maxsize=pool_maxsize)
+
+    @classmethod
+    def adapters(cls) -> dict:
+        """
+        This method returns the shared adapters by URL prefix, creating them on first use
+        """
+        if cls.__pid != os.getpid():
+            cls.reset()
+        with cls.__lock:
+            if cls.__adapters is None:
+                adapter = cls.__create_adapter(cls.pool_maxsize)
+                cls.__adapters = {"https://": adapter, "http://": adapter}
+                for host, pool_maxsize in cls.host_pool_maxsize.items():
+                    adapter = cls.__create_adapter(pool_maxsize)
+                    cls.__adapters[f"https://{host}"] = adapter
+                    cls.__adapters[f"http://{host}"] = adapter
+            return cls.__adapters
+
+    @classmethod
+    def mount(cls, session: requests.Session):
+        """
+        This method mounts the shared adapters on a requests session, which keeps them until they are replaced
+        """
+        with cls.__lock:
+            cls.__sessions.add(session)
+        cls.__mount(session)
+
+    @classmethod
+    def unmount(cls, session: requests.Session):
+        """
+        This method stops tracking a session, ex: once it is closed
+        """
+        with cls.__lock:
+            cls.__sessions.discard(session)
+
+    @classmethod
+    def __mount(cls, session: requests.Session, replaced_adapters=()):
+        # Prefixes of replaced adapters are removed first, ex: a host which has no pool of its own anymore
+        for prefix, adapter in list(session.adapters.items()):
+            if adapter in replaced_adapters:
+                del session.adapters[prefix]
+        for prefix, adapter in cls.adapters().items():
+            session.mount(prefix, adapter)
+        if not cls.keep_alive:
+            session.headers["Connection"] = "close"
+        elif session.headers.get("Connection") == "close":
+            del session.headers["Connection"]
+
+    @classmethod
+    def __replace_adapters(cls, close=True):
+        """
+        This method drops the shared adapters and mounts new ones on the tracked sessions
+        :param close: Close pools of the dropped adapters, requests in flight finish on their connection first
+        """
+        with cls.__lock:
+            replaced_adapters = set((cls.__adapters or dict()).values())
+            cls.__adapters = None
+            sessions = list(cls.__sessions)
+        for session in sessions:
+            cls.__mount(session, replaced_adapters)
+        if close:
+            for adapter in replaced_adapters:
+                adapter.close()
+
+    @classmethod
+    def close(cls):
+        """
+        This method closes the shared pools, ex: at shutdown, next use opens new ones
+        """
+        cls.__replace_adapters()
+
+    @classmethod
+    def reset(cls):
+        """
+        This method drops the pools without closing them, used in a forked child (sockets belong to the parent)
+        """
+        cls.__lock = threading.Lock()
+        cls.__pid = os.getpid()
+        cls.__replace_adapters(close=False)
+
+    @classmethod
+    def statistics(cls) -> dict:
+        """
+        This method returns number of shared adapters and host pools open in them
+        """
+        with cls.__lock:
+            adapters = set((cls.__adapters or dict()).values())
+            return {"adapters": len(adapters),
+                    "host_pools": sum(len(adapter.poolmanager.pools) for adapter in adapters)}
 
 
 class HTTPRequests(object):
@@ -14,55 +178,100 @@ class HTTPRequests(object):
     """
     # Class Variables
     no_response = "No Response !!"
+    # HTTPInstrumentation (ex: HTTPMetrics) called for every request of the process, None to disable
+    instrumentation = None
+
+    def __init__(self, **kwargs):
+        # Connection pools are shared with the process through HTTPTransport, False keeps private pools
+        self.shared_transport = True
+
+        self.__dict__.update(kwargs)
 
-    def __init__(self):
         # Created Requests session for Blip API
         self.session = requests.Session()
+        if self.shared_transport:
+            HTTPTransport.mount(self.session)
 
         logging.debug(f"Instance variables for HTTPRequests : {self.__dict__}")
 
-    def __del__(self):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
         """
-        Explicitly closed session object
+        This method releases the session, shared pools stay open for other instances (see HTTPTransport.close)
         """
-        self.session.close()
+        if self.shared_transport:
+            HTTPTransport.unmount(self.session)
+        else:
+            self.session.close()
 
-    def call_get_requests(self, url: str, headers=None, params=None, stream=False,
-                          error_message="Error in GET Request : "):
+    def __request(self, method: str, url: str, error_message: str, stream=False, **request_arguments):
         """
-        Static method to call requests to get response using GET calls
-        :param headers: Headers for get call
+        This method sends a request on the session, errors are logged and None or the failed response returned
+        Request and response are logged at DEBUG only, bodies are never read here (see HTTPMetrics)
+        :param method: HTTP method
         :param stream: If data to be streamed ?
-        :param url:  URL for get call
-        :param params:  Parameters for the call
-        :param error_message: Error message to be printed in case of exception
+        :param request_arguments: Arguments for requests, ex: headers, params, data
         :return: Response from the requests call
         """
         response = None
-        logging.info(f"Url for HTTP request : {url}")
-        logging.info(f"Parameters for HTTP request : {params}")
-        logging.info(f"Headers for HTTP request : {headers}")
-        logging.info(f"Request Stream (True/False)? : {stream}")
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(f"{method} request : {redact(url)} {redact(request_arguments)} (stream : {stream})")
+        started = time.perf_counter()
         try:
-            response = self.session.get(url, headers=headers, params=params, stream=stream)
+            response = self.session.request(method, url, stream=stream, **request_arguments)
             response.raise_for_status()
         except requests.exceptions.RequestException as error:
-            logging.error(error_message + str(error))
+            # Error of a failed status contains the URL with its query, ex: ?token=...
+            logging.error(error_message + redact(error))
         finally:
-            if response:
-                logging.debug(f"Status Code : {response.status_code}")
-                logging.debug(f"Total Time taken : {response.elapsed}")
-                logging.debug(f"Encoding : {response.encoding}")
-                logging.debug(f"Response Headers : {response.headers}")
-                logging.debug(f"Request Headers : {response.request.headers}")
-                if not stream:
-                    logging.debug(f"Size of Response : {len(response.content)}")
-                if response.encoding or response.text:
-                    logging.debug(f"Response Text : {response.text}")
-            else:
+            elapsed_seconds = time.perf_counter() - started
+            if response is not None and logging.getLogger().isEnabledFor(logging.DEBUG):
+                logging.debug(f"{method} response : {response.status_code} in {elapsed_seconds:.3f}s, "
+                              f"Content-Length {response.headers.get('Content-Length')}")
+            if not response:
                 logging.critical(HTTPRequests.no_response)
+            if self.instrumentation is not None:
+                self.__instrument(method, url, response, elapsed_seconds, stream)
         return response
 
+    def __instrument(self, method: str, url: str, response, elapsed_seconds: float, stream: bool):
+        """
+        This method hands a finished request to the instrumentation, which must never fail the request
+        """
+        try:
+            request_bytes = response_bytes = 0
+            status_code = None
+            if response is not None:
+                status_code = response.status_code
+                body = response.request.body
+                request_bytes = len(body) if isinstance(body, (bytes, str)) else 0
+                if stream:
+                    response_bytes = int(response.headers.get("Content-Length") or 0)
+                else:
+                    response_bytes = len(response.content)
+            self.instrumentation.record(method, url, status_code, elapsed_seconds, request_bytes, response_bytes,
+                                        response=response, stream=stream)
+        except BaseException:
+            logging.error(f"Uncaught exception in http_requests.py : {traceback.format_exc()}")
+
+    def call_get_requests(self, url: str, headers=None, params=None, stream=False,
+                          error_message="Error in GET Request : "):
+        """
+        Static method to call requests to get response using GET calls
+        :param headers: Headers for get call
+        :param stream: If data to be streamed ?
+        :param url:  URL for get call
+        :param params:  Parameters for the call
+        :param error_message: Error message to be printed in case of exception
+        :return: Response from the requests call
+        """
+        return self.__request("GET", url, error_message, headers=headers, params=params, stream=stream)
+
     def call_put_requests(self, url: str, headers=None, params=None, data=None,
                           error_message="Error in PUT Request : "):
         """
@@ -74,29 +283,7 @@ class HTTPRequests(object):
         :param error_message: Error message to be printed in case of exception
         :return: Response from the requests call
         """
-        response = None
-        logging.info(f"Url for HTTP request : {url}")
-        logging.info(f"Parameters for HTTP request : {params}")
-        logging.info(f"Headers for HTTP request : {headers}")
-        logging.info(f"Data for HTTP request : {data}")
-        try:
-            response = self.session.put(url, headers=headers, params=params, data=data)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as error:
-            logging.error(error_message + str(error))
-        finally:
-            if response:
-                logging.debug(f"Status Code : {response.status_code}")
-                logging.debug(f"Total Time taken : {response.elapsed}")
-                logging.debug(f"Encoding : {response.encoding}")
-                logging.debug(f"Response Headers : {response.headers}")
-                logging.debug(f"Request Headers : {response.request.headers}")
-                logging.debug(f"Size of Response : {len(response.content)}")
-                if response.encoding or response.text:
-                    logging.debug(f"Response Text : {response.text}")
-            else:
-                logging.critical(HTTPRequests.no_response)
-        return response
+        return self.__request("PUT", url, error_message, headers=headers, params=params, data=data)
 
     def call_post_requests(self, url: str, data=None, headers=None, params=None, files=None,
                            auth=None, error_message="Error in POST Request : "):
@@ -111,31 +298,8 @@ class HTTPRequests(object):
         :param auth: Authorization for the call
         :return: Response from the requests call
         """
-        response = None
-        logging.info(f"Url for HTTP request : {url}")
-        logging.info(f"Parameters for HTTP request : {params}")
-        logging.info(f"Headers for HTTP request : {headers}")
-        logging.info(f"Data for HTTP request : {data}")
-        logging.info(f"Files for HTTP request : {files}")
-        logging.info(f"Auth for HTTP request : {auth}")
-        try:
-            response = self.session.post(url, headers=headers, params=params, files=files, data=data, auth=auth)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as error:
-            logging.error(error_message + str(error))
-        finally:
-            if response:
-                logging.debug(f"Status Code : {response.status_code}")
-                logging.debug(f"Total Time taken : {response.elapsed}")
-                logging.debug(f"Encoding : {response.encoding}")
-                logging.debug(f"Response Headers : {response.headers}")
-                logging.debug(f"Request Headers : {response.request.headers}")
-                logging.debug(f"Size of response : {len(response.content)}")
-                if response.encoding or response.text:
-                    logging.debug(f"Response Text : {response.text}")
-            else:
-                logging.critical(HTTPRequests.no_response)
-        return response
+        return self.__request("POST", url, error_message, headers=headers, params=params, files=files,
+                              data=data, auth=auth)
 
     def call_delete_requests(self, url: str, params=None, error_message="Error in DELETE Request : "):
         """
@@ -145,27 +309,7 @@ class HTTPRequests(object):
         :param error_message: Error message to be printed in case of exception
         :return: Response from the requests call
         """
-        response = None
-        logging.info(f"Url for HTTP request : {url}")
-        logging.info(f"Parameters for HTTP request : {params}")
-        try:
-            response = self.session.delete(url, params=params)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as error:
-            logging.error(error_message + str(error))
-        finally:
-            if response:
-                logging.debug(f"Status Code : {response.status_code}")
-                logging.debug(f"Total Time taken : {response.elapsed}")
-                logging.debug(f"Encoding : {response.encoding}")
-                logging.debug(f"Response Headers : {response.headers}")
-                logging.debug(f"Request Headers : {response.request.headers}")
-                logging.debug(f"Size of response : {len(response.content)}")
-                if response.encoding or response.text:
-                    logging.debug(f"Response Text : {response.text}")
-            else:
-                logging.critical(HTTPRequests.no_response)
-        return response
+        return self.__request("DELETE", url, error_message, params=params)
 
     def call_head_requests(self, url: str, error_message="Error in HEAD Request : "):
         """
@@ -174,26 +318,11 @@ class HTTPRequests(object):
         :param error_message: Error message to be printed in case of exception
         :return: Response from the requests call
         """
-        response = None
-        logging.info(f"Url for HTTP request : {url}")
-        try:
-            response = self.session.head(url)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as error:
-            logging.error(error_message + str(error))
-        finally:
-            if response:
-                logging.debug(f"Status Code : {response.status_code}")
-                logging.debug(f"Total Time taken : {response.elapsed}")
-                logging.debug(f"Encoding : {response.encoding}")
-                logging.debug(f"Response Headers : {response.headers}")
-                logging.debug(f"Request Headers : {response.request.headers}")
-                logging.debug(f"Size of response : {len(response.content)}")
-                if response.encoding or response.text:
-                    logging.debug(f"Response Text : {response.text}")
-            else:
-                logging.critical(HTTPRequests.no_response)
-        return response
+        return self.__request("HEAD", url, error_message, allow_redirects=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=HTTPTransport.reset)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+#!/usr/bin/python3
+# coding= utf-8
+"""
+This is a helper script to defer import of heavy modules until they are used
+"""
+import importlib
+import logging
+import sys
+
+
+class LazyModule(object):
+    """
+    This class stands in for a module and imports it on first attribute access, ex: boto3 = LazyModule("boto3")
+    Several names can be given, first one which imports is used (same as try / except ModuleNotFoundError)
+    """
+
+    def __init__(self, *names):
+        self.names = names
+        self.module = None
+
+    def load(self):
+        """
+        This method imports the module, later calls return it from the instance
+        Import lock of the interpreter makes concurrent first calls safe
+        """
+        if self.module is None:
+            for name in self.names[:-1]:
+                try:
+                    self.module = importlib.import_module(name)
+                    break
+                except ModuleNotFoundError:
+                    logging.info("Module called internally")
+            else:
+                self.module = importlib.import_module(self.names[-1])
+        return self.module
+
+    def __getattr__(self, attribute):
+        return getattr(self.load(), attribute)
+
+    def __repr__(self):
+        return f"<LazyModule {self.names[-1]} ({'loaded' if self.module else 'not loaded'})>"
+
+
+def lazy_submodules(package_name: str, names) -> tuple:
+    """
+    This method returns module level __getattr__ and __dir__ (PEP 562) of a package, which import its submodules
+    on first access, so importing the package stays cheap. ex: __getattr__, __dir__ = lazy_submodules(__name__, __all__)
+    :param package_name: __name__ of the package
+    :param names: Submodule names, usually __all__
+    """
+    package = sys.modules[package_name]
+
+    def __getattr__(name):
+        if name in names:
+            return importlib.import_module(f".{name}", package_name)
+        raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+
+    def __dir__():
+        return sorted(set(vars(package)) | set(names))
+
+    return __getattr__, __dir__
+
+
+# Imported on first session / client creation or presigned URL, botocore alone takes a few hundred milliseconds
+boto3 = LazyModule("boto3")
+botocore_config = LazyModule("botocore.config")
+arn_session_module = LazyModule("amagi_library.boto3_helper.arn_session", "boto3_helper.arn_session")
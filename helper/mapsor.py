@@ -27,9 +27,9 @@ class Mapsor(object):
 
         logging.debug(f"Instance variables for Mapsor : {self.__dict__}")
 
-    def __del__(self):
+    def close(self):
         # Removing HTTP request session
-        self.http_requests_instance.__del__()
+        self.http_requests_instance.close()
 
     def create_container_job(self, **kwargs):
         """
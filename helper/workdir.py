@@ -3,17 +3,23 @@
 """
 ???
 """
+import os
 import shutil
 import tempfile
 
 
 class WorkDirectory:
-    def __init__(self, prefix="workdir"):
+    def __init__(self, prefix="workdir", work_dir=None):
         self.prefix = prefix
+        # A fixed work_dir survives restarts (ex: a mounted volume), otherwise a new temporary one is created
+        self.work_dir = work_dir
         self.init_work_dir()
 
     def init_work_dir(self):
-        self.work_dir = tempfile.mkdtemp(prefix=self.prefix)
+        if self.work_dir:
+            os.makedirs(self.work_dir, exist_ok=True)
+        else:
+            self.work_dir = tempfile.mkdtemp(prefix=self.prefix)
 
     def get_work_dir(self):
         return self.work_dir
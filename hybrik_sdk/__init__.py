@@ -3,4 +3,14 @@
 """
 Init file for Helper scripts
 """
+import logging
+
+try:
+    from amagi_library.helper.lazy_import import lazy_submodules
+except ModuleNotFoundError:
+    logging.info("Module called internally")
+    from helper.lazy_import import lazy_submodules
+
 __all__ = ["hybrik"]
+
+__getattr__, __dir__ = lazy_submodules(__name__, __all__)
@@ -36,8 +36,8 @@ class Hybrik(object):
         self.token, self.expiration_time = self.api_token()
         logging.debug(f"Instance variables for Hybrik : {self.__dict__}")
 
-    def __del__(self):
-        self.hybrik_session.__del__()
+    def close(self):
+        self.hybrik_session.close()
 
     def api_token(self):
         """